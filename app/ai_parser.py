@@ -9,8 +9,10 @@ LLM OUTPUT SAFETY: All LLM output access uses safe_get() - never dot access.
 
 import json
 import re
+import time
+from collections import OrderedDict
+from threading import Lock
 from typing import Union
-from groq import Groq
 from app.config import settings
 from app.models import ParsedIntent
 from app.llm_output_handler import safe_get, safe_get_nested
@@ -443,6 +445,58 @@ Now parse the following request and respond with ONLY valid JSON, no explanation
 
 
 
+# normalize_human_input tables, compiled once. Typos that are plain words are
+# replaced on word boundaries; the rest (with spaces) are literal replaces.
+_TYPO_MAP = {
+    'rotet': 'rotate',
+    'roate': 'rotate',
+    'rotae': 'rotate',
+    'rotate teh': 'rotate the',
+    'teh ': 'the ',
+    'degres': 'degrees',
+    'splti': 'split',
+    'compres': 'compress',
+    'comress': 'compress',
+    'mergee': 'merge',
+    'wattermark': 'watermark',
+    'watermak': 'watermark',
+    'orc': 'ocr',
+    'exract': 'extract',
+    'extrat': 'extract',
+}
+_TYPO_FIXES = tuple(
+    (re.compile(rf"\b{re.escape(typo)}\b") if typo.isalpha() else None, typo, correct)
+    for typo, correct in _TYPO_MAP.items()
+)
+
+_SHORTHAND_MAP = {
+    r'\brot\b': 'rotate',
+    r'\bzip\b': 'compress as small as possible',
+    r'\btxt\b': 'extract text',
+    r'\bimg\b': 'export as png images',
+    r'\bpng\b': 'export as png images',
+    r'\bjpg\b': 'export as jpg images',
+    r'\bdocx?\b': 'convert to docx',
+    r'\bword\b': 'convert to word',
+    r'\bppt\b': 'convert to ppt',
+    r'\bxlsx?\b': 'convert to excel',
+    r'\bhtml\b': 'convert to html',
+}
+_SHORTHAND_EXPANSIONS = tuple((re.compile(pattern), replacement) for pattern, replacement in _SHORTHAND_MAP.items())
+_IMAGE_SHORTHANDS = {r'\bpng\b', r'\bjpg\b', r'\bimg\b'}
+
+_COMPRESSION_MAP = {
+    r'\bemail\b': 'compress to email-safe size (10MB max)',
+    r'\bwhatsapp\b': 'compress very aggressively for whatsapp',
+    r'\bsmallest\b': 'compress to smallest possible size',
+    r'\btiny\b': 'compress as small as possible',
+    r'\bhalf.?size\b': 'compress to half size',
+    r'\bsmaller\b': 'make file smaller',
+    r'\breduced\b': 'reduce file size',
+}
+_COMPRESSION_HINTS = tuple((re.compile(pattern), replacement) for pattern, replacement in _COMPRESSION_MAP.items())
+
+
 def normalize_human_input(user_prompt: str, last_question: str = "") -> str:
     """
     Normalize messy real-world input before sending to LLM.
@@ -460,59 +514,29 @@ def normalize_human_input(user_prompt: str, last_question: str = "") -> str:
     Returns:
         Normalized prompt ready for LLM
     """
-    import re
     p = user_prompt.strip().lower()
     
-    typo_map = {
-        'rotet': 'rotate',
-        'roate': 'rotate',
-        'rotae': 'rotate',
-        'rotate teh': 'rotate the',
-        'teh ': 'the ',
-        'degres': 'degrees',
-        'splti': 'split',
-        'compres': 'compress',
-        'comress': 'compress',
-        'mergee': 'merge',
-        'wattermark': 'watermark',
-        'watermak': 'watermark',
-        'orc': 'ocr',
-        'exract': 'extract',
-        'extrat': 'extract',
-    }
-    for typo, correct in typo_map.items():
-      if typo.isalpha():
-        p = re.sub(rf"\b{re.escape(typo)}\b", correct, p)
+    for word_rx, typo, correct in _TYPO_FIXES:
+      if word_rx is not None:
+        p = word_rx.sub(correct, p)
       else:
         p = p.replace(typo, correct)
     
-    shorthand_map = {
-        r'\brot\b': 'rotate',
-        r'\bzip\b': 'compress as small as possible',
-        r'\btxt\b': 'extract text',
-        r'\bimg\b': 'export as png images',
-        r'\bpng\b': 'export as png images',
-        r'\bjpg\b': 'export as jpg images',
-        r'\bdocx?\b': 'convert to docx',
-        r'\bword\b': 'convert to word',
-        r'\bppt\b': 'convert to ppt',
-        r'\bxlsx?\b': 'convert to excel',
-        r'\bhtml\b': 'convert to html',
-    }
-    for pattern, replacement in shorthand_map.items():
-      if pattern in {r'\bpng\b', r'\bjpg\b', r'\bimg\b'} and ("export" in p or "image" in p or "images" in p):
+    for rx, replacement in _SHORTHAND_EXPANSIONS:
+      if rx.pattern in _IMAGE_SHORTHANDS and ("export" in p or "image" in p or "images" in p):
         continue
-      if pattern == r'\btxt\b' and ("extract" in p and "text" in p):
+      if rx.pattern == r'\btxt\b' and ("extract" in p and "text" in p):
         continue
-      p = re.sub(pattern, replacement, p)
+      p = rx.sub(replacement, p)
     
-    if re.match(r'^\d+$', p) and 'degree' in last_question.lower():
+    question_lower = last_question.lower()
+    if p.isdecimal() and 'degree' in question_lower:
         p = f'rotate {p} degrees'
     
-    elif re.match(r'^\d+$', p) and ('page' in last_question.lower() and 'extract' in last_question.lower()):
+    elif p.isdecimal() and ('page' in question_lower and 'extract' in question_lower):
         p = f'split page {p}'
     
-    elif re.match(r'^\d+\s*(mb|kb)?$', p, re.IGNORECASE) and 'size' in last_question.lower():
+    elif RE_NUMERIC_WITH_UNIT.match(p) and 'size' in question_lower:
         p = f'compress to {p}'
     
     rotate_aliases = {
@@ -526,22 +550,35 @@ def normalize_human_input(user_prompt: str, last_question: str = "") -> str:
         if alias in p:
             p = p.replace(alias, expansion)
     
-    compression_map = {
-        r'\bemail\b': 'compress to email-safe size (10MB max)',
-        r'\bwhatsapp\b': 'compress very aggressively for whatsapp',
-        r'\bsmallest\b': 'compress to smallest possible size',
-        r'\btiny\b': 'compress as small as possible',
-        r'\bhalf.?size\b': 'compress to half size',
-        r'\bsmaller\b': 'make file smaller',
-        r'\breduced\b': 'reduce file size',
-    }
-    for pattern, replacement in compression_map.items():
-        p = re.sub(pattern, replacement, p)
+    for rx, replacement in _COMPRESSION_HINTS:
+        p = rx.sub(replacement, p)
     
     return p
 
 
 
+class ClarificationNeeded(ValueError):
+    """The model asked a question instead of returning an intent.
+
+    str(e) keeps the "CLARIFICATION_NEEDED: ... | OPTIONS: [...]" form; callers read the
+    question and options from the attributes instead of splitting the message.
+    """
+
+    def __init__(self, clarification: str, options: list[str] | None = None):
+        message = f"CLARIFICATION_NEEDED: {clarification}"
+        if options:
+            message += f" | OPTIONS: {json.dumps(options)}"
+        super().__init__(message)
+        self.clarification = clarification
+        self.options = options or None
+
+
+# Raw model replies kept per (model, user message); least recently used dropped first,
+# and entries older than RESPONSE_CACHE_TTL seconds are refetched.
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = 3600
+
+
 class AIParser:
     """Parses user intent using Groq LLM with dual-model fallback"""
     
@@ -549,6 +586,8 @@ class AIParser:
         self.client = None
         self.primary_model = settings.llm_model
         self.fallback_model = getattr(settings, 'llm_model_fallback', settings.llm_model)
+        self._response_cache: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        self._response_cache_lock = Lock()
         self._init_client()
     
     def _init_client(self):
@@ -558,13 +597,38 @@ class AIParser:
             if not api_key or api_key == "test-key-configure-in-env":
                 print("[AI Parser] WARNING: Groq API key not configured")
                 return
+            from groq import Groq
+
             self.client = Groq(api_key=api_key)
         except Exception as e:
             print(f"[AI Parser] ERROR initializing Groq client: {e}")
             self.client = None
     
     def _call_model(self, model: str, user_message: str) -> dict:
-        """Call a specific model and return parsed JSON response"""
+        """Call a specific model and return parsed JSON response.
+
+        The message already carries the normalized prompt and the file names, so an
+        identical message (e.g. the same option clicked twice) reuses the stored reply
+        instead of another round-trip. The order-ambiguity helper asks for the same few
+        reordered prompts on every retry, so those hit here too. Each call parses a fresh
+        dict from the raw text.
+        """
+        key = (model, user_message)
+        now = time.monotonic()
+        cached = None
+        with self._response_cache_lock:
+            entry = self._response_cache.get(key)
+            if entry is not None:
+                stored_at, raw = entry
+                if now - stored_at < RESPONSE_CACHE_TTL:
+                    self._response_cache.move_to_end(key)
+                    cached = raw
+                else:
+                    del self._response_cache[key]
+        if cached is not None:
+            print(f"[AI:{model}] Cached response")
+            return json.loads(cached)
+
         if not self.client:
             # Try to reinitialize client
             self._init_client()
@@ -583,7 +647,12 @@ class AIParser:
         )
         raw_json = response.choices[0].message.content
         print(f"[AI:{model}] Response: {raw_json}")
-        return json.loads(raw_json)
+        parsed = json.loads(raw_json)
+        with self._response_cache_lock:
+            self._response_cache[key] = (now, raw_json)
+            if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+        return parsed
     
     def parse_intent(self, user_prompt: str, file_names: list[str], last_question: str = "") -> Union[ParsedIntent, list[ParsedIntent]]:
         """
@@ -657,11 +726,7 @@ Parse this into JSON:"""
                 
                 clarification_msg = f"{question}\n\n{suggested_format}" if suggested_format else question
                 
-                if options:
-                    options_str = json.dumps(options)
-                    raise ValueError(f"CLARIFICATION_NEEDED: {clarification_msg} | OPTIONS: {options_str}")
-                
-                raise ValueError(f"CLARIFICATION_NEEDED: {clarification_msg}")
+                raise ClarificationNeeded(clarification_msg, options)
 
             if safe_get(parsed_json, "is_multi_operation") and isinstance(safe_get(parsed_json, "operations"), list):
               intents: list[ParsedIntent] = []
@@ -678,12 +743,12 @@ Parse this into JSON:"""
             
             return intent
             
+        except ClarificationNeeded:
+            raise
         except json.JSONDecodeError as e:
             print(f"[ERR] JSON decode error: {e}")
             raise ValueError(f"LLM returned invalid JSON: {e}")
         except ValueError as e:
-            if "CLARIFICATION_NEEDED" in str(e):
-                raise
             print(f"[ERR] Validation error: {e}")
             raise ValueError(f"Failed to validate intent: {e}")
         except Exception as e:
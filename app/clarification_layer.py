@@ -15,7 +15,7 @@ INTEGRATION WITH NEW MODULES:
 LLM OUTPUT SAFETY: All LLM output access uses safe_get() - never dot access.
 """
 
-from app.ai_parser import ai_parser
+from app.ai_parser import ai_parser, ClarificationNeeded
 from typing import Union
 from app.error_handler import ErrorClassifier
 from app.command_intelligence import CommandIntelligence, ResolutionPipeline
@@ -39,35 +39,34 @@ except ImportError:
     ONE_FLOW_AVAILABLE = False
 from app.utils import (
     normalize_whitespace,
-    fuzzy_match_keyword,
-    ALL_NORMALIZE_KEYWORDS,
+    normalize_keyword,
+    scan_op_families,
     RE_EXPLICIT_ORDER,
     RE_AND_THEN,
     RE_BEFORE,
     RE_AFTER,
-    RE_MERGE_OPS,
-    RE_SPLIT_OPS,
-    RE_DELETE_OPS,
-    RE_COMPRESS_OPS,
-    RE_CONVERT_OPS,
-    RE_ROTATE_OPS,
-    RE_REORDER_OPS,
-    RE_WATERMARK_OPS,
-    RE_PAGE_NUMBERS_OPS,
-    RE_OCR_OPS,
-    RE_IMAGES_OPS,
-    RE_PAGE_WITH_DIGIT,
-    RE_DIGIT_RANGE,
-    RE_DIGIT_COMMA,
+    RE_PAGE_SIGNAL,
 )
 
 class ClarificationResult:
+    __slots__ = ("intent", "clarification", "options")
+
     def __init__(self, intent: Union['ParsedIntent', list['ParsedIntent'], None] = None, clarification: str = None, options: list[str] = None):
         self.intent = intent
         self.clarification = clarification
         self.options = options
 
 
+def _ok(intent: Union['ParsedIntent', list['ParsedIntent']]) -> ClarificationResult:
+    """Resolved result carrying one intent or a multi-step list."""
+    return ClarificationResult(intent=intent)
+
+
+def _ask(clarification: str, options: list[str] = None) -> ClarificationResult:
+    """Result that asks the user a question, optionally with clickable options."""
+    return ClarificationResult(clarification=clarification, options=options)
+
+
 error_classifier = ErrorClassifier()
 command_intelligence = CommandIntelligence()
 resolution_pipeline = ResolutionPipeline()
@@ -75,15 +74,448 @@ resolution_pipeline = ResolutionPipeline()
 
 import re
 import os
-import json
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
 from app.models import (
     ParsedIntent,
+    MergeIntent,
+    SplitIntent,
+    DeleteIntent,
+    CompressIntent,
+    CompressToTargetIntent,
+    RotateIntent,
+    ReorderIntent,
+    DocxToPdfIntent,
+    DocxConvertIntent,
+    RemoveBlankPagesIntent,
+    RemoveDuplicatePagesIntent,
+    EnhanceScanIntent,
+    FlattenPdfIntent,
+    WatermarkIntent,
+    PageNumbersIntent,
+    ExtractTextIntent,
+    PdfToImagesIntent,
+    ImagesToPdfIntent,
+    SplitToFilesIntent,
+    OcrIntent,
 )
 from app.pdf_operations import get_upload_path
 
 
 UNSUPPORTED_REPLY = "Not supported yet or sooner"
 
+# Fixed replies without options hold nothing mutable, so one instance is shared by every
+# caller (see _copy_clarification_result).
+_REPLY_UNSUPPORTED = _ask(clarification=UNSUPPORTED_REPLY)
+_REPLY_ALREADY_IMAGE = _ask(clarification="Already an image")
+_REPLY_MULTI_STEP_HELP = _ask(
+    clarification=(
+        "Sorry, I couldn't fully understand the multi-step request. "
+        "Try adding an explicit order like: 'split pages 1-2 and then compress to 2MB'."
+    )
+)
+# Returned by a combo that matched only part of a longer request; clarify_intent then
+# hands the whole prompt to the multi-step path instead of a later single-op heuristic.
+_DEFER_TO_MULTI_STEP = ClarificationResult()
+_REPLY_HELP = _ask(
+    clarification=(
+        "Sorry, I couldn't understand your request. Here are some examples:\n\n"
+        "📄 Merge: 'merge these files', 'combine all PDFs'\n"
+        "✂️ Split: 'split 1st page', 'extract first 3 pages', 'keep pages 1-5'\n"
+        "🗑️ Delete: 'delete page 2', 'remove pages 3, 4, 5'\n"
+        "🗜️ Compress: 'compress to 1mb', 'compress to 5MB', 'compress by 50%'\n"
+        "📝 Convert: 'convert to docx', 'pdf to word'\n"
+        "🔄 Rotate: 'rotate page 1 by 90 degrees'\n"
+        "🔀 Reorder: 'reorder pages to 2,1,3'\n"
+        "🏷️ Watermark: 'watermark with CONFIDENTIAL'\n"
+        "#️⃣ Page numbers: 'add page numbers'\n"
+        "📄 Text: 'extract text'\n"
+        "🖼️ Images: 'export pages as png'\n"
+        "🔎 OCR: 'ocr this scan'\n\n"
+        "Please try again with a clearer instruction!"
+    )
+)
+
+_RE_WATERMARK = re.compile(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(?P<word>\S+)(?P<rest>.*)", re.IGNORECASE)
+_RE_ROTATE_LEFT = re.compile(r"\b(left|counter|anti)\b")
+_RE_180 = re.compile(r"\b180\b")
+_RE_270 = re.compile(r"\b270\b")
+_RE_REORDER_ORDER = re.compile(r"\b(?:to|as)\b\s*([0-9,\s]+)")
+# Inside a combo prompt the order has to follow the reorder verb itself, so "rotate to 90"
+# is never read as a page order.
+_RE_COMBO_REORDER_ORDER = re.compile(r"\b(?:reorder|order|swap)\b(?:\s+(?:the\s+)?pages?)?(?:\s+(?:to|as))?\s*(\d[\d,\s]*)")
+_RE_CLEAN_UP = re.compile(r"\bclean\s+up\b")
+
+# Qualitative compression wording for _infer_compress_preset.
+_RE_PRESET_SCREEN = re.compile(r"\b(very\s*tiny|tiny|as\s*small\s*as\s*possible|smallest|max(?:imum)?|strong(?:ly)?|a\s*lot)\b")
+_RE_PRESET_PRINTER = re.compile(r"\b(a\s*little|little\s*bit|a\s*bit|slight(?:ly)?|light(?:ly)?|minor)\b")
+_RE_PRESET_PREPRESS = re.compile(r"\b(best\s*quality|highest\s*quality|minimal\s*compression|don\s*'?t\s*lose\s*quality)\b")
+
+# Single-operation shortcuts in clarify_intent (matched against the lowercased prompt).
+# Whole-prompt image export requests -> output format.
+_IMAGE_FORMAT_SHORTCUTS = MappingProxyType({
+    "png": "png",
+    "jpg": "jpg",
+    "jpeg": "jpg",
+    "img": "png",
+    "to img": "png",
+    "to image": "png",
+    "to images": "png",
+})
+
+_RE_CONVERT_VERB = re.compile(r"\b(convert|change)\b")
+_RE_WORD_TARGET = re.compile(r"\b(word|docx|doc)\b")
+_RE_PDF_TARGET = re.compile(r"\bpdf\b")
+_RE_IMAGES_TARGET = re.compile(r"\b(images?|img|png|jpe?g)\b")
+_RE_JPG = re.compile(r"\bjpe?g\b|\bjpg\b")
+_RE_SPLIT_ALL_PAGES = re.compile(r"\bsplit\s+(all\s+)?pages?\b")
+_RE_PAGE_LIST = re.compile(r"\b(pages?\s+)?\d+(-\d+)?(\s*,\s*\d+(-\d+)?)*\b")
+
+# Paired tail shortcuts, each read with one _scan_first_matches pass. The alternatives
+# of a pair never match at the same position, so the scan sees exactly the first match
+# each separate search would have found.
+_RE_COMPRESS_TARGET = re.compile(
+    r"(?P<mb>compress(?: this| pdf)?(?: to| under)?\s*(?P<mb_value>\d+)\s*mb)"
+    r"|(?P<percent>compress(?: this)?(?: pdf)? by (?P<percent_value>\d{1,3})%)"
+)
+_RE_FIRST_PAGES = re.compile(
+    r"(?P<first_page>(?:split|extract|keep)\s*(?:1st|first|page 1)\s*page)"
+    r"|(?P<first_n>(?:split|extract|keep)\s*first\s*(?P<first_n_value>\d+)\s*pages?)"
+)
+_RE_ROTATE_NUMBER = re.compile(r"(-?\d+)\s*(deg|degree|degrees)?\b")
+
+
+def _snap_rotation(normalized: int) -> int:
+    """Nearest supported right angle for 0-359 degrees; 0 means a plain quarter turn."""
+    if normalized == 0:
+        return 90
+    return min((90, 180, 270), key=lambda d: min((normalized - d) % 360, (d - normalized) % 360))
+
+
+# Snapped rotation for every angle mod 360, indexed by the normalized angle.
+_ROTATION_BY_ANGLE = tuple(_snap_rotation(n) for n in range(360))
+_RE_COMPRESS_WORD = re.compile(r"\bcompress\b")
+
+_RE_WHITESPACE = re.compile(r"\s+")
+_RE_NON_PAGE_RANGE_CHARS = re.compile(r"[^0-9,\-\s]")
+_RE_ALPHA_WORD = re.compile(r"[A-Za-z]{2,}")
+# Clause helpers lowercase their input once and match without re.IGNORECASE.
+_RE_ORDER_WORDS = re.compile(r"\b(and then|then|after|before|first|second|finally)\b")
+_RE_ROTATE_VERB = re.compile(r"\b(rotate|turn|straight|flip)\b")
+_RE_MERGE_VERB = re.compile(r"\b(merge|combine|join)\b")
+_RE_IMAGES_TO_PDF_CLAUSE = re.compile(r"\bimages?_to_pdf\b|\b(images?)\s*(to|into)\s*pdf\b")
+_RE_OCR_WORD = re.compile(r"\bocr\b")
+_RE_DELETE_VERB = re.compile(r"\b(delete|remove)\b")
+_RE_SPLIT_VERB = re.compile(r"\b(split|extract|keep)\b")
+_RE_REORDER_VERB = re.compile(r"\breorder\b|\bswap\b")
+_RE_WATERMARK_WORD = re.compile(r"\bwatermark\b")
+_RE_PAGE_NUMBERS_WORDS = re.compile(r"\bpage\s*numbers?\b")
+_RE_FLIP_WORD = re.compile(r"\bflip\b")
+_RE_DEGREES_PHRASE = re.compile(r"\b\d+\s*degrees?\b", re.IGNORECASE)
+
+# Final-output clauses for _terminal_type, in precedence order. _clause_priority ranks
+# the same clauses last (90 and up), in the same order.
+_TERMINAL_TYPES = (
+    (re.compile(r"\b(convert|docx|word)\b"), "docx"),
+    (re.compile(r"\b(png|jpg|jpeg|images?)\b"), "images"),
+    (re.compile(r"\bextract\s+text\b|\btxt\b"), "text"),
+    (re.compile(r"\bsplit\s*to\s*files\b|\bseparate\s+pdfs\b"), "zip"),
+)
+
+# Connector typos fixed on the original-case prompt by _fix_common_connector_typos,
+# all whole words, so one pass replaces them through the lowercase lookup.
+_CONNECTOR_TYPOS = {"adn": "and", "n": "and", "thne": "then", "thn": "then"}
+_RE_CONNECTOR_TYPOS = re.compile(r"\b(adn|n|thne|thn)\b", re.IGNORECASE)
+
+_ADJACENT_OPS = r"(compress|merge|combine|join|split|extract|keep|delete|remove|convert|rotate|reorder|watermark|ocr|images?|docx|word|txt)"
+_RE_ADJACENT_OPS = re.compile(rf"\b{_ADJACENT_OPS}\b\s+\b{_ADJACENT_OPS}\b", re.IGNORECASE)
+_RE_AND_WORD = re.compile(r"\band\b", re.IGNORECASE)
+_RE_FIRST_OR_QUESTION = re.compile(r"first[^\n]*?['\"]([^'\"]+)['\"][^\n]*?\bor\b\s*([^?\n]+)\??", re.IGNORECASE)
+
+# Follow-up suggestions after a finished operation (lowercased prompt).
+_RE_FOLLOWUP_COMPRESS = re.compile(r"\b(compress|smaller|reduce|shrink)\b")
+_RE_FOLLOWUP_MERGE = re.compile(r"\b(merge|combine|together)\b")
+
+# Unsupported features for _is_explicitly_unsupported_request (lowercased prompt).
+_RE_UNSUPPORTED_CONVERT_VERB = re.compile(r"\b(convert|change|export)\b")
+_RE_UNSUPPORTED_FORMAT = re.compile(r"\b(pptx?|powerpoint|xlsx?|xls|excel|csv|html?)\b")
+_RE_UNSUPPORTED_FEATURE = re.compile(r"\b(password|encrypt|decrypt|unlock|protect|sign|signature|e-?sign)\b")
+_RE_EDIT_VERB = re.compile(r"\b(edit|annotate|highlight)\b")
+# Every pattern above contains one of these substrings ("crypt" covers encrypt/decrypt,
+# "sign" covers signature/e-sign), so prompts without any skip the regexes.
+_UNSUPPORTED_TRIGGERS = (
+    "convert", "change", "export", "password", "crypt", "unlock", "protect", "sign",
+    "edit", "annotate", "highlight",
+)
+
+# Whole-prompt commands too vague to act on (lowercased, stripped prompt).
+_RE_VAGUE_COMMAND = re.compile(
+    r"^(?:do\s*(it|this|that)?|why\s*(not)?|ok(ay)?|yes|no|sure|go\s*(ahead)?|start|run|execute"
+    r"|process|proceed|begin|make\s*it|fix\s*(it)?|help|what|how|huh|eh|idk|dunno|whatever)$"
+)
+_RECOGNIZABLE_WORDS = (
+    "merge", "combine", "join", "split", "extract", "keep", "delete", "remove",
+    "compress", "reduce", "shrink", "small", "convert", "pdf", "docx", "word",
+    "png", "jpg", "jpeg", "image", "rotate", "turn", "flip", "reorder", "swap",
+    "reverse", "watermark", "page", "number", "ocr", "scan", "enhance", "flatten",
+    "optimize", "text", "to", "into", "as", "from", "all", "first", "last",
+)
+
+# One alternation for the single-op shortcuts at the end of clarify_intent. Words that
+# trigger two shortcuts ("delete" is both a page selection and a delete request) get a
+# group of their own, mapped to both names in _SHORTCUT_NAMES.
+_RE_SHORTCUTS = re.compile(
+    r"\b(?:"
+    r"(?P<split_to_files_selection>split\s+to\s*files)"
+    r"|(?P<split_to_files>split\s*to\s*files|separate\s+pdfs|each\s+page)"
+    r"|(?P<split>split)"
+    r"|(?P<delete>delete)"
+    r"|(?P<page_selection>extract page|keep page)"
+    r"|(?P<ocr>ocr|make searchable)"
+    r"|(?P<extract_text>extract text|extract_text|get text)"
+    r"|(?P<flatten>flatten|flat)"
+    r"|(?P<enhance>enhance|clean|fix scan)"
+    r"|(?P<merge>merge|combine|join)"
+    r"|(?P<remove>remove)"
+    r"|(?P<reverse>reverse)"
+    r"|(?P<reorder>reorder|swap)"
+    r"|(?P<watermark>watermark)"
+    r"|(?P<page_numbers>page\s*numbers?|number\s*pages)"
+    r"|(?P<flip>flip)"
+    r"|(?P<rotate>rotate|rotat|turn|straight)"
+    r"|(?P<rotate_left>left|anti|anticlock|counter)"
+    r"|(?P<rotate_right>right|clockwise)"
+    r")\b"
+)
+
+_SHORTCUT_NAMES = {
+    "split_to_files_selection": ("split_to_files", "page_selection"),
+    "split_to_files": ("split_to_files",),
+    "split": ("page_selection",),
+    "delete": ("page_selection", "delete"),
+    "page_selection": ("page_selection",),
+    "ocr": ("ocr",),
+    "extract_text": ("extract_text",),
+    "flatten": ("flatten",),
+    "enhance": ("enhance",),
+    "merge": ("merge",),
+    "remove": ("delete",),
+    "reverse": ("reorder", "reverse"),
+    "reorder": ("reorder",),
+    "watermark": ("watermark",),
+    "page_numbers": ("page_numbers",),
+    "flip": ("rotate", "flip"),
+    "rotate": ("rotate",),
+    "rotate_left": ("rotate_left",),
+    "rotate_right": ("rotate_right",),
+}
+
+_RE_KEYWORDS = re.compile(
+    r"\b(?:"
+    r"(?P<email_ready>email\s*ready|for\s*email|send\s*(?:by\s*)?email|email\s*size)"
+    r"|(?P<fix_scan>fix\s*(?:this\s*)?scan|fix\s*scanned|clean\s*scan)"
+    r"|(?P<print_ready>print\s*ready|for\s*print|printing)"
+    r"|(?P<searchable>make\s*searchable|searchable\s*pdf|text\s*searchable)"
+    r"|(?P<secure>(?:secure|protect|sanitize)\s*pdf)"
+    r"|(?P<optimize>optimize\s*(?:file|pdf)?|optimise)"
+    r"|(?P<final>final\s*(?:version|pdf|copy)?|finalize)"
+    r"|(?P<duplicate>duplicate)"
+    r"|(?P<reverse>reverse)"
+    r"|(?P<submission>submission\s*ready|college\s*submission|submit|assignment)"
+    r"|(?P<archive>archive\s*ready|for\s*archive|archiving)"
+    r"|(?P<whatsapp>(?:whatsapp|wa)\s*(?:size|ready)?)"
+    r"|(?P<govt>(?:govt|government)\s*(?:submission)?)"
+    r"|(?P<scan_quality>scan\s*quality|quality\s*fix|improve\s*scan)"
+    r"|(?P<neat>make\s*it\s*neat|neat\s*up|tidy)"
+    r"|(?P<professional>make\s*professional|professional\s*(?:copy|version)?|look\s*professional)"
+    r"|(?P<sendable>sendable|shareable|share\s*ready)"
+    r"|(?P<convert_shrink>convert\s*(?:and|&)\s*(?:shrink|compress|smaller))"
+    r"|(?P<scan_to_pdf>scan\s*to\s*pdf)"
+    r"|(?P<combine_fix>combine\s*(?:and|&)\s*fix|merge\s*(?:and|&)\s*clean)"
+    r"|(?P<combine_shrink>combine\s*(?:and|&)\s*(?:shrink|compress)|merge\s*(?:and|&)\s*(?:shrink|compress))"
+    r"|(?P<fix_orientation>fix\s*(?:orientation|rotation)|orientation\s*fix)"
+    r"|(?P<remove_extra>remove\s*extra|extra\s*pages?|unwanted\s*pages?)"
+    r"|(?P<mobile>mobile\s*(?:optimized?|ready)?|for\s*mobile|phone\s*size)"
+    r")\b"
+)
+
+
+def _scan_keywords(prompt_compact: str) -> set[str]:
+    """
+    Names of every _RE_KEYWORDS group present in the prompt.
+
+    Like _scan_capabilities, each search restarts just past the previous match start so
+    a phrase inside a longer one is still seen ("govt submission ready" is both govt
+    and submission).
+    """
+    hits = set()
+    search = _RE_KEYWORDS.search
+    m = search(prompt_compact)
+    while m is not None:
+        hits.add(m.lastgroup)
+        m = search(prompt_compact, m.start() + 1)
+    return hits
+
+
+def _scan_first_matches(pattern: re.Pattern, text: str, names: tuple[str, ...]) -> dict[str, re.Match]:
+    """
+    First match of each top-level named group of an alternation, in one pass.
+
+    Uses the same overlapping restart as _scan_keywords and stops once every name in
+    names has been seen.
+    """
+    found: dict[str, re.Match] = {}
+    search = pattern.search
+    m = search(text)
+    while m is not None:
+        found.setdefault(m.lastgroup, m)
+        if len(found) == len(names):
+            break
+        m = search(text, m.start() + 1)
+    return found
+
+
+def _scan_shortcuts(prompt_compact: str) -> set[str]:
+    """
+    Single-op shortcut names (ocr, merge, page_selection, ...) present in the prompt.
+
+    Uses the same overlapping restart as _scan_keywords.
+    """
+    hits = set()
+    search = _RE_SHORTCUTS.search
+    m = search(prompt_compact)
+    while m is not None:
+        hits.update(_SHORTCUT_NAMES[m.lastgroup])
+        m = search(prompt_compact, m.start() + 1)
+    return hits
+
+
+# ParsedIntent factories for the heuristic paths. Every value passed in is produced by
+# this module (file names, parsed page lists, known presets), so validation is skipped
+# with model_construct; nested intents must be model instances, not dicts.
+
+def _pi_merge(files: list[str]) -> ParsedIntent:
+    return ParsedIntent.model_construct(operation_type="merge", merge=MergeIntent.model_construct(files=list(files)))
+
+
+def _pi_split(file: str, pages: list[int]) -> ParsedIntent:
+    return ParsedIntent.model_construct(operation_type="split", split=SplitIntent.model_construct(file=file, pages=pages))
+
+
+def _pi_delete(file: str, pages: list[int]) -> ParsedIntent:
+    return ParsedIntent.model_construct(operation_type="delete", delete=DeleteIntent.model_construct(file=file, pages_to_delete=pages))
+
+
+def _pi_compress(file: str, preset: str | None = None) -> ParsedIntent:
+    return ParsedIntent.model_construct(operation_type="compress", compress=CompressIntent.model_construct(file=file, preset=preset))
+
+
+def _pi_compress_to_target(file: str, target_mb: int) -> ParsedIntent:
+    return ParsedIntent.model_construct(
+        operation_type="compress_to_target",
+        compress_to_target=CompressToTargetIntent.model_construct(file=file, target_mb=target_mb),
+    )
+
+
+def _pi_rotate(file: str, degrees: int) -> ParsedIntent:
+    return ParsedIntent.model_construct(operation_type="rotate", rotate=RotateIntent.model_construct(file=file, degrees=degrees, pages=None))
+
+
+def _pi_reorder(file: str, new_order) -> ParsedIntent:
+    return ParsedIntent.model_construct(operation_type="reorder", reorder=ReorderIntent.model_construct(file=file, new_order=new_order))
+
+
+# Single-file operations differ only in their nested model and constant extra fields, so
+# each op shares one read-only template and a call only supplies the file name.
+_FILE_OP_TEMPLATES = {
+    "docx_to_pdf": (DocxToPdfIntent, MappingProxyType({})),
+    "pdf_to_docx": (DocxConvertIntent, MappingProxyType({})),
+    "remove_blank_pages": (RemoveBlankPagesIntent, MappingProxyType({})),
+    "remove_duplicate_pages": (RemoveDuplicatePagesIntent, MappingProxyType({})),
+    "enhance_scan": (EnhanceScanIntent, MappingProxyType({})),
+    "flatten_pdf": (FlattenPdfIntent, MappingProxyType({})),
+    "page_numbers": (PageNumbersIntent, MappingProxyType({})),
+    "extract_text": (ExtractTextIntent, MappingProxyType({"pages": None})),
+    "ocr": (OcrIntent, MappingProxyType({"language": "eng", "deskew": True})),
+}
+
+
+def _pi_file_op(op_type: str, file: str) -> ParsedIntent:
+    model, extra = _FILE_OP_TEMPLATES[op_type]
+    return ParsedIntent.model_construct(operation_type=op_type, **{op_type: model.model_construct(file=file, **extra)})
+
+
+def _pi_file_ops(file: str, ops: tuple[str, ...]) -> list[ParsedIntent]:
+    """Expand a chain of single-file operations on the same file."""
+    return [_pi_file_op(op, file) for op in ops]
+
+
+# Recurring single-file chains in the multi-step heuristics.
+_PIPE_ENHANCE_OCR = ("enhance_scan", "ocr")
+_PIPE_DOCX_FLATTEN = ("docx_to_pdf", "flatten_pdf")
+_PIPE_OCR_FLATTEN = ("ocr", "flatten_pdf")
+_PIPE_OCR_PAGE_NUMBERS = ("ocr", "page_numbers")
+_PIPE_DOCX_PAGE_NUMBERS = ("docx_to_pdf", "page_numbers")
+_PIPE_BLANK_FLATTEN = ("remove_blank_pages", "flatten_pdf")
+
+
+def _pi_docx_to_pdf(file: str) -> ParsedIntent:
+    return _pi_file_op("docx_to_pdf", file)
+
+
+def _pi_pdf_to_docx(file: str) -> ParsedIntent:
+    return _pi_file_op("pdf_to_docx", file)
+
+
+def _pi_remove_blank_pages(file: str) -> ParsedIntent:
+    return _pi_file_op("remove_blank_pages", file)
+
+
+def _pi_enhance_scan(file: str) -> ParsedIntent:
+    return _pi_file_op("enhance_scan", file)
+
+
+def _pi_flatten_pdf(file: str) -> ParsedIntent:
+    return _pi_file_op("flatten_pdf", file)
+
+
+def _pi_watermark(file: str, text: str) -> ParsedIntent:
+    return ParsedIntent.model_construct(operation_type="watermark", watermark=WatermarkIntent.model_construct(file=file, text=text))
+
+
+def _pi_page_numbers(file: str) -> ParsedIntent:
+    return _pi_file_op("page_numbers", file)
+
+
+def _pi_extract_text(file: str) -> ParsedIntent:
+    return _pi_file_op("extract_text", file)
+
+
+def _pi_pdf_to_images(file: str, fmt: str = "png", dpi: int = 150) -> ParsedIntent:
+    return ParsedIntent.model_construct(
+        operation_type="pdf_to_images",
+        pdf_to_images=PdfToImagesIntent.model_construct(file=file, format=fmt, dpi=dpi),
+    )
+
+
+def _pi_images_to_pdf(files: list[str]) -> ParsedIntent:
+    return ParsedIntent.model_construct(
+        operation_type="images_to_pdf",
+        images_to_pdf=ImagesToPdfIntent.model_construct(files=list(files)),
+    )
+
+
+def _pi_split_to_files(file: str, pages: list[int] | None = None) -> ParsedIntent:
+    return ParsedIntent.model_construct(
+        operation_type="split_to_files",
+        split_to_files=SplitToFilesIntent.model_construct(file=file, pages=pages),
+    )
+
+
+def _pi_ocr(file: str) -> ParsedIntent:
+    return _pi_file_op("ocr", file)
+
 
 def _is_short_followup(prompt: str) -> bool:
     """Check if this is a short follow-up command (≤5 tokens, likely depends on context)."""
@@ -142,41 +574,33 @@ def _rephrase_with_context(user_prompt: str, last_intent: Union['ParsedIntent',
         fmt = 'jpg' if 'jpg' in prompt_lower or 'jpeg' in prompt_lower else 'png'
         return f"convert the result to {fmt} images"
     
-    if re.search(r'\b(compress|smaller|reduce|shrink)\b', prompt_lower):
+    if _RE_FOLLOWUP_COMPRESS.search(prompt_lower):
         if last_op not in ('compress', 'compress_to_target'):
             return f"compress the result"
     
-    if re.search(r'\b(merge|combine|together)\b', prompt_lower) and last_op not in ('merge',):
+    if _RE_FOLLOWUP_MERGE.search(prompt_lower) and last_op not in ('merge',):
         return f"merge all the files together"
     
     return None
 
 
-def _is_explicitly_unsupported_request(prompt: str) -> bool:
+def _is_explicitly_unsupported_request(prompt_compact: str) -> bool:
     """Return True if the user is clearly requesting a currently unsupported feature.
 
     Corpus rule: if unsupported, reply exactly with UNSUPPORTED_REPLY.
-    Keep this conservative to avoid false positives.
+    Keep this conservative to avoid false positives. Expects the lowercased prompt.
     """
-    p = (prompt or "").lower()
-    if not p:
+    p = prompt_compact or ""
+    if not p or not any(word in p for word in _UNSUPPORTED_TRIGGERS):
         return False
 
-    wants_convert = bool(re.search(r"\b(convert|change|export)\b", p))
-
-    if wants_convert and re.search(r"\b(pptx?|powerpoint)\b", p):
-        return True
-    if wants_convert and re.search(r"\b(xlsx?|xls|excel|csv)\b", p):
-        return True
-    if wants_convert and re.search(r"\bhtml?\b", p):
+    if _RE_UNSUPPORTED_CONVERT_VERB.search(p) and _RE_UNSUPPORTED_FORMAT.search(p):
         return True
 
-    if re.search(r"\b(password|encrypt|decrypt|unlock|protect)\b", p):
-        return True
-    if re.search(r"\b(sign|signature|e-?sign)\b", p):
+    if _RE_UNSUPPORTED_FEATURE.search(p):
         return True
 
-    if re.search(r"\b(edit|annotate|highlight)\b", p) and "pdf" in p:
+    if "pdf" in p and _RE_EDIT_VERB.search(p):
         return True
 
     return False
@@ -204,74 +628,75 @@ def _parse_page_ranges(text: str) -> list[int]:
     if not text:
         return []
     s = text.replace("pages", "").replace("page", "")
-    s = re.sub(r"[^0-9,\-\s]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    if not s:
-        return []
+    s = _RE_NON_PAGE_RANGE_CHARS.sub(" ", s)
     pages: set[int] = set()
-    for part in [p.strip() for p in s.split(",") if p.strip()]:
+    # Parts are stripped below, so runs of spaces left by the sub need no collapsing.
+    for part in s.split(","):
+        part = part.strip()
+        if not part:
+            continue
         if "-" in part:
-            a, b = [x.strip() for x in part.split("-", 1)]
+            a, _, b = part.partition("-")
+            a = a.strip()
+            b = b.strip()
             if a.isdigit() and b.isdigit():
                 start = int(a)
                 end = int(b)
                 if start > 0 and end > 0:
                     lo, hi = (start, end) if start <= end else (end, start)
-                    for i in range(lo, hi + 1):
-                        pages.add(i)
-        else:
-            if part.isdigit():
-                n = int(part)
-                if n > 0:
-                    pages.add(n)
+                    pages.update(range(lo, hi + 1))
+        elif part.isdigit():
+            n = int(part)
+            if n > 0:
+                pages.add(n)
     return sorted(pages)
 
 
+@lru_cache(maxsize=2048)
 def _normalize_prompt_for_heuristics(user_prompt: str) -> str:
     """Normalize common operation keywords for typo tolerance.
 
     This is only used for regex shortcuts and heuristics. The original prompt is still
-    sent to the LLM to preserve full meaning.
+    sent to the LLM to preserve full meaning. Memoized: one request normalizes the same
+    prompt from clarify_intent, _looks_like_multi_operation_prompt and the preset helper,
+    and each call runs a fuzzy match per word.
     """
-    return re.sub(r"[A-Za-z]{2,}", lambda m: fuzzy_match_keyword(m.group(0), ALL_NORMALIZE_KEYWORDS), user_prompt)
+    return _RE_ALPHA_WORD.sub(lambda m: normalize_keyword(m.group(0)), user_prompt)
 
 
+@lru_cache(maxsize=1024)
 def _looks_like_multi_operation_prompt(user_prompt: str) -> bool:
-    """Heuristic: if prompt appears to request 2+ ops (or uses explicit sequencing), don't short-circuit to a single-op regex."""
+    """Heuristic: if prompt appears to request 2+ ops (or uses explicit sequencing), don't short-circuit to a single-op regex.
+
+    Memoized on the raw prompt: clarify_intent asks twice per call (single-op shortcuts
+    and the multi-step path), and repeated clicks on the same option ask again.
+    """
     prompt = _normalize_prompt_for_heuristics(user_prompt).lower()
 
     if RE_EXPLICIT_ORDER.search(prompt):
         return True
 
-    op_hits = 0
-    if RE_MERGE_OPS.search(prompt):
-        op_hits += 1
-    if RE_SPLIT_OPS.search(prompt):
-        op_hits += 1
-    if RE_DELETE_OPS.search(prompt):
-        op_hits += 1
-    if RE_COMPRESS_OPS.search(prompt):
-        op_hits += 1
-    if RE_CONVERT_OPS.search(prompt):
-        op_hits += 1
-    if RE_ROTATE_OPS.search(prompt) or RE_REORDER_OPS.search(prompt) or RE_WATERMARK_OPS.search(prompt) or RE_PAGE_NUMBERS_OPS.search(prompt) or RE_OCR_OPS.search(prompt) or RE_IMAGES_OPS.search(prompt):
-        op_hits += 1
-
-    return op_hits >= 2
+    return scan_op_families(prompt, stop_at=2).bit_count() >= 2
 
 
-def _options_for_pages_question(prefix: str) -> list[str]:
-    return [
+@lru_cache(maxsize=None)
+def _pages_question_options(prefix: str) -> tuple[str, ...]:
+    return (
         f"{prefix} pages 1",
         f"{prefix} pages 1-2",
         f"{prefix} pages 1-3",
         "all pages",
-    ]
+    )
+
+
+def _options_for_pages_question(prefix: str) -> list[str]:
+    # The strings are formatted once per prefix; callers still get their own list.
+    return list(_pages_question_options(prefix))
 
 
 def _extract_page_range_tokens(prompt: str) -> bool:
     p = (prompt or "").lower()
-    return bool(RE_PAGE_WITH_DIGIT.search(p) or RE_DIGIT_RANGE.search(p) or RE_DIGIT_COMMA.search(p))
+    return RE_PAGE_SIGNAL.search(p) is not None
 
 
 def _split_two_step_explicit_order(user_prompt: str) -> tuple[str, str] | None:
@@ -280,36 +705,19 @@ def _split_two_step_explicit_order(user_prompt: str) -> tuple[str, str] | None:
     Supports: "A and then B", "A then B", "A before B", "A after B".
     """
     s = _fix_common_connector_typos(user_prompt)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _RE_WHITESPACE.sub(" ", s).strip()
     if not s:
         return None
 
-    m = RE_AND_THEN.search(s)
-    if m:
-        parts = RE_AND_THEN.split(s, maxsplit=1)
-        if len(parts) >= 3:
-            a = parts[0].strip(" ,.;")
-            b = parts[2].strip(" ,.;")
-            if a and b:
-                return a, b
-
-    m = RE_BEFORE.search(s)
-    if m:
-        parts = RE_BEFORE.split(s, maxsplit=1)
-        if len(parts) == 2:
-            a = parts[0].strip(" ,.;")
-            b = parts[1].strip(" ,.;")
+    # Each connector is searched once and the prompt sliced around the first hit,
+    # which is what a maxsplit=1 split would return.
+    for connector, swap in ((RE_AND_THEN, False), (RE_BEFORE, False), (RE_AFTER, True)):
+        m = connector.search(s)
+        if m:
+            a = s[:m.start()].strip(" ,.;")
+            b = s[m.end():].strip(" ,.;")
             if a and b:
-                return a, b
-
-    m = RE_AFTER.search(s)
-    if m:
-        parts = RE_AFTER.split(s, maxsplit=1)
-        if len(parts) == 2:
-            a = parts[0].strip(" ,.;")
-            b = parts[1].strip(" ,.;")
-            if a and b:
-                return b, a
+                return (b, a) if swap else (a, b)
 
     return None
 
@@ -342,12 +750,12 @@ def _fallback_parse_multi_step_pipeline(user_prompt: str, file_names: list[str])
     clause using single-op heuristics (allow_multi=False).
     """
     s = _fix_common_connector_typos(user_prompt)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _RE_WHITESPACE.sub(" ", s).strip()
     if not s:
         return None
 
-    if RE_AND_THEN.search(s):
-        parts = RE_AND_THEN.split(s)
+    parts = RE_AND_THEN.split(s)
+    if len(parts) > 1:
         steps = [p.strip(" ,.;") for p in parts if p.strip(" ,.;")]
     else:
         two = _split_two_step_explicit_order(s)
@@ -372,22 +780,64 @@ def _fallback_parse_multi_step_pipeline(user_prompt: str, file_names: list[str])
     return intents
 
 
+def _extract_watermark_text(user_prompt: str) -> tuple[str, str]:
+    """
+    Watermark text following 'watermark', as (first word, rest of the line).
+
+    Multi-step combos only take the first word; single-op paths keep the whole phrase.
+    Original casing is kept and surrounding quotes are stripped.
+    """
+    m = _RE_WATERMARK.search(user_prompt)
+    if not m:
+        return "", ""
+    word = m.group("word")
+    return word.strip("\"'"), (word + m.group("rest")).strip().strip("\"'")
+
+
+def _is_int_literal(s: str) -> bool:
+    """True for a bare integer such as "90" or "-90" (decimal digits only)."""
+    return (s[1:] if s[:1] == "-" else s).isdecimal()
+
+
+def _rotation_degrees(prompt_compact: str, allow_270: bool = False) -> int:
+    """
+    Clockwise degrees implied by the prompt (default 90).
+
+    The literal substring checks are cheap and rule out most prompts; the word-boundary
+    regex only runs to confirm a hit.
+    """
+    if ("left" in prompt_compact or "counter" in prompt_compact or "anti" in prompt_compact) and _RE_ROTATE_LEFT.search(prompt_compact):
+        return 270
+    if "180" in prompt_compact and _RE_180.search(prompt_compact):
+        return 180
+    if allow_270 and "270" in prompt_compact and _RE_270.search(prompt_compact):
+        return 270
+    return 90
+
+
+@lru_cache(maxsize=1024)
 def _infer_compress_preset(user_prompt: str) -> str:
-    """Infer a Ghostscript-like preset from qualitative wording."""
+    """
+    Infer a Ghostscript-like preset from qualitative wording.
+
+    Memoized on the raw prompt: a multi-step request asks for the preset from several
+    branches, and the normalization below is the expensive part.
+    """
     prompt = _normalize_prompt_for_heuristics(user_prompt).lower()
 
-    if re.search(r"\b(very\s*tiny|tiny|as\s*small\s*as\s*possible|smallest|max(?:imum)?|strong(?:ly)?|a\s*lot)\b", prompt):
+    if _RE_PRESET_SCREEN.search(prompt):
         return "screen"
 
-    if re.search(r"\b(a\s*little|little\s*bit|a\s*bit|slight(?:ly)?|light(?:ly)?|minor)\b", prompt):
+    if _RE_PRESET_PRINTER.search(prompt):
         return "printer"
 
-    if re.search(r"\b(best\s*quality|highest\s*quality|minimal\s*compression|don\s*'?t\s*lose\s*quality)\b", prompt):
+    if _RE_PRESET_PREPRESS.search(prompt):
         return "prepress"
 
     return "ebook"
 
 
+@lru_cache(maxsize=2048)
 def _fix_common_connector_typos(text: str) -> str:
     """
     Fix common typos and expand shorthand using ErrorClassifier.
@@ -396,6 +846,9 @@ def _fix_common_connector_typos(text: str) -> str:
     1. Typos (compres → compress)
     2. Shorthand (to docx → convert to docx)
     3. Connector typos (adn → and)
+
+    Memoized on the text: clarify_intent, the clause splitter and the order
+    helpers all re-fix the same prompt within one request.
     """
     if not text:
         return text
@@ -410,35 +863,39 @@ def _fix_common_connector_typos(text: str) -> str:
     if shorthand_correction:
         s = shorthand_correction
     
-    s = re.sub(r"\badn\b", "and", s, flags=re.IGNORECASE)
-    s = re.sub(r"\bn\b", "and", s, flags=re.IGNORECASE)
-    s = re.sub(r"\bthne\b", "then", s, flags=re.IGNORECASE)
-    s = re.sub(r"\bthn\b", "then", s, flags=re.IGNORECASE)
+    s = _RE_CONNECTOR_TYPOS.sub(lambda m: _CONNECTOR_TYPOS[m.group(1).lower()], s)
 
     return s
 
 
+@lru_cache(maxsize=2048)
 def _has_explicit_order_words(text: str) -> bool:
-    return bool(re.search(r"\b(and then|then|after|before|first|second|finally)\b", text or "", re.IGNORECASE))
+    return _RE_ORDER_WORDS.search((text or "").lower()) is not None
 
 
+@lru_cache(maxsize=2048)
 def _insert_missing_and_between_ops(text: str) -> str:
-    """Turn shorthand like 'compress rotate 90' into 'compress and rotate 90'."""
+    """Turn shorthand like 'compress rotate 90' into 'compress and rotate 90'.
+
+    Memoized like _fix_common_connector_typos: the clause splitters and the order
+    helpers each derive this form from the same fixed prompt.
+    """
     if not text:
         return text
-    ops = r"(compress|merge|combine|join|split|extract|keep|delete|remove|convert|rotate|reorder|watermark|ocr|images?|docx|word|txt)"
-    return re.sub(rf"\b{ops}\b\s+\b{ops}\b", r"\1 and \2", text, flags=re.IGNORECASE)
+    return _RE_ADJACENT_OPS.sub(r"\1 and \2", text)
 
 
+@lru_cache(maxsize=2048)
 def _canonicalize_clause(clause: str) -> str:
+    # Memoized: the order-ambiguity checks canonicalize the same two clauses per branch.
     s = (clause or "").strip()
     if not s:
         return s
     lower = s.lower().strip()
 
-    if "compress" in lower and re.search(r"\b\d+\s*degrees?\b", lower):
-        s = re.sub(r"\b\d+\s*degrees?\b", "", s, flags=re.IGNORECASE)
-        s = re.sub(r"\s+", " ", s).strip(" ,.;")
+    if "compress" in lower and _RE_DEGREES_PHRASE.search(lower):
+        s = _RE_DEGREES_PHRASE.sub("", s)
+        s = _RE_WHITESPACE.sub(" ", s).strip(" ,.;")
         lower = s.lower().strip()
     if lower in {"png", "jpg", "jpeg"}:
         return f"export pages as {lower} images"
@@ -449,43 +906,69 @@ def _canonicalize_clause(clause: str) -> str:
     if lower == "ocr":
         return "ocr this"
 
-    if re.search(r"\b(rotate|turn|straight|flip)\b", lower) and not re.search(r"-?\d+", lower):
-        if re.search(r"\bflip\b", lower):
+    if _RE_ROTATE_VERB.search(lower) and not any(ch.isdecimal() for ch in lower):
+        if _RE_FLIP_WORD.search(lower):
             return "rotate 180 degrees"
         return "rotate 90 degrees"
     return s
 
 
-def _detect_op_families(text: str) -> set[str]:
+# One alternation for _detect_op_families. Phrases that count for two families at the same
+# position ("split to files" is also a split, "extract text" also an extract) get a
+# group of their own, mapped to both names in _OP_FAMILY_NAMES.
+_RE_OP_FAMILIES = re.compile(
+    r"\b(?:"
+    r"(?P<split_to_files_split>split\s+to\s*files)"
+    r"|(?P<extract_text_split>extract\s+text)"
+    r"|(?P<split_to_files>split\s*to\s*files|each\s*page\s*(?:as|into)\s*(?:a\s*)?pdf|separate\s+pdfs)"
+    r"|(?P<extract_text>text\s+only)"
+    r"|(?P<merge>merge|combine|join)"
+    r"|(?P<split>split|extract|keep)"
+    r"|(?P<delete>delete|remove)"
+    r"|(?P<compress>compress|smaller|size)"
+    r"|(?P<reorder>reorder|order|swap|reverse)"
+    r"|(?P<watermark>watermark)"
+    r"|(?P<page_numbers>page\s*numbers?)"
+    r"|(?P<ocr>ocr|scanned|selectable|editable|readable)"
+    r"|(?P<rotate>rotate|turn|straight|flip)"
+    r"|(?P<convert>docx|word|convert)"
+    r"|(?P<images>png|jpg|jpeg|images?)"
+    r")\b"
+)
+
+_OP_FAMILY_NAMES = {
+    "split_to_files_split": ("split_to_files", "split"),
+    "extract_text_split": ("extract_text", "split"),
+    "split_to_files": ("split_to_files",),
+    "extract_text": ("extract_text",),
+    "merge": ("merge",),
+    "split": ("split",),
+    "delete": ("delete",),
+    "compress": ("compress",),
+    "reorder": ("reorder",),
+    "watermark": ("watermark",),
+    "page_numbers": ("page_numbers",),
+    "ocr": ("ocr",),
+    "rotate": ("rotate",),
+    "convert": ("convert",),
+    "images": ("images",),
+}
+
+
+@lru_cache(maxsize=1024)
+def _detect_op_families(text: str) -> frozenset[str]:
+    """Operation families named in the text, in one overlapping _RE_OP_FAMILIES pass.
+
+    Memoized, so the result is frozen; callers only test membership and size.
+    """
     s = (text or "").lower()
     ops: set[str] = set()
-    if re.search(r"\b(merge|combine|join)\b", s):
-        ops.add("merge")
-    if re.search(r"\b(split|extract|keep)\b", s):
-        ops.add("split")
-    if re.search(r"\b(delete|remove)\b", s):
-        ops.add("delete")
-    if re.search(r"\bcompress\b|\bsmaller\b|\bsize\b", s):
-        ops.add("compress")
-    if re.search(r"\breorder\b|\border\b|\bswap\b|\breverse\b", s):
-        ops.add("reorder")
-    if re.search(r"\bwatermark\b", s):
-        ops.add("watermark")
-    if re.search(r"\bpage\s*numbers\b|\bpage\s*number\b", s):
-        ops.add("page_numbers")
-    if re.search(r"\bocr\b|\bscanned\b|\bselectable\b|\beditable\b|\breadable\b", s):
-        ops.add("ocr")
-    if re.search(r"\brotate\b|\bturn\b|\bstraight\b|\bflip\b", s):
-        ops.add("rotate")
-    if re.search(r"\b(docx|word|convert)\b", s):
-        ops.add("convert")
-    if re.search(r"\b(png|jpg|jpeg|images?)\b", s):
-        ops.add("images")
-    if re.search(r"\bsplit\s*to\s*files\b|\beach\s*page\s*(as|into)\s*(a\s*)?pdf\b|\bseparate\s+pdfs\b", s):
-        ops.add("split_to_files")
-    if re.search(r"\bextract\s+text\b|\btext\s+only\b", s):
-        ops.add("extract_text")
-    return ops
+    search = _RE_OP_FAMILIES.search
+    m = search(s)
+    while m is not None:
+        ops.update(_OP_FAMILY_NAMES[m.lastgroup])
+        m = search(s, m.start() + 1)
+    return frozenset(ops)
 
 
 def _split_clauses_no_order(user_prompt: str) -> list[str]:
@@ -496,7 +979,7 @@ def _split_clauses_no_order(user_prompt: str) -> list[str]:
     """
     s = _fix_common_connector_typos(user_prompt)
     s = _insert_missing_and_between_ops(s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _RE_WHITESPACE.sub(" ", s).strip()
     if not s:
         return []
     if _has_explicit_order_words(s):
@@ -504,7 +987,8 @@ def _split_clauses_no_order(user_prompt: str) -> list[str]:
 
     parts: list[str] = []
     for chunk in [c.strip() for c in s.split(",") if c.strip()]:
-        sub = re.split(r"\band\b", chunk, flags=re.IGNORECASE)
+        # Most chunks hold no "and" at all; a substring probe skips the regex split.
+        sub = _RE_AND_WORD.split(chunk) if "and" in chunk.lower() else (chunk,)
         for p in sub:
             p = p.strip(" ,.;")
             if p:
@@ -515,80 +999,82 @@ def _split_clauses_no_order(user_prompt: str) -> list[str]:
 
 def _clause_priority(clause: str, file_names: list[str]) -> int:
     """Lower runs earlier."""
+    return _clause_rank(clause, len(file_names) >= 2)
+
+
+@lru_cache(maxsize=2048)
+def _clause_rank(clause: str, can_merge: bool) -> int:
+    """_clause_priority for one clause; memoized, as sort keys repeat per option."""
     c = (clause or "").lower()
-    if re.search(r"\bimages?_to_pdf\b|\b(images?)\s*(to|into)\s*pdf\b", c):
+    if _RE_IMAGES_TO_PDF_CLAUSE.search(c):
         return 0
-    if re.search(r"\b(merge|combine|join)\b", c) and len(file_names) >= 2:
+    if can_merge and _RE_MERGE_VERB.search(c):
         return 1
-    if re.search(r"\bocr\b", c):
+    if _RE_OCR_WORD.search(c):
         return 2
 
-    if re.search(r"\b(delete|remove)\b", c):
+    if _RE_DELETE_VERB.search(c):
         return 10
-    if re.search(r"\b(split|extract|keep)\b", c):
+    if _RE_SPLIT_VERB.search(c):
         return 11
-    if re.search(r"\breorder\b|\bswap\b", c):
+    if _RE_REORDER_VERB.search(c):
         return 12
-    if re.search(r"\brotate\b|\bturn\b|\bstraight\b|\bflip\b", c):
+    if _RE_ROTATE_VERB.search(c):
         return 13
 
-    if re.search(r"\bwatermark\b", c):
+    if _RE_WATERMARK_WORD.search(c):
         return 20
-    if re.search(r"\bpage\s*numbers?\b", c):
+    if _RE_PAGE_NUMBERS_WORDS.search(c):
         return 21
 
-    if re.search(r"\bcompress\b", c):
+    if _RE_COMPRESS_WORD.search(c):
         return 30
 
-    if re.search(r"\b(convert|docx|word)\b", c):
-        return 90
-    if re.search(r"\b(png|jpg|jpeg|images?)\b", c):
-        return 91
-    if re.search(r"\bextract\s+text\b|\btxt\b", c):
-        return 92
-    if re.search(r"\bsplit\s*to\s*files\b|\bseparate\s+pdfs\b", c):
-        return 93
+    for priority, (pattern, _) in enumerate(_TERMINAL_TYPES, start=90):
+        if pattern.search(c):
+            return priority
 
     return 50
 
 
 def _terminal_type(clause: str) -> str | None:
     c = (clause or "").lower()
-    if re.search(r"\b(convert|docx|word)\b", c):
-        return "docx"
-    if re.search(r"\b(png|jpg|jpeg|images?)\b", c):
-        return "images"
-    if re.search(r"\bextract\s+text\b|\btxt\b", c):
-        return "text"
-    if re.search(r"\bsplit\s*to\s*files\b|\bseparate\s+pdfs\b", c):
-        return "zip"
+    for pattern, terminal in _TERMINAL_TYPES:
+        if pattern.search(c):
+            return terminal
     return None
 
 
-def _auto_order_multi_op_no_order(user_prompt: str, file_names: list[str]) -> str | None:
-    """Return a runnable ordered prompt for multi-op requests with no explicit order."""
+def _auto_order_multi_op_no_order(user_prompt: str, file_names: list[str]) -> str | ClarificationResult | None:
+    """Return a runnable ordered prompt for multi-op requests with no explicit order.
+
+    If the clauses ask for two different final outputs, return a ClarificationResult
+    offering one ordering per output instead.
+    """
     clauses = _split_clauses_no_order(user_prompt)
     if len(clauses) < 2:
         return None
 
     normalized = [_canonicalize_clause(c) for c in clauses]
 
+    # Classify each clause once; the options below reuse the same split.
+    terminal_types = [_terminal_type(c) for c in normalized]
     terminals = {}
-    for c in normalized:
-        t = _terminal_type(c)
+    for c, t in zip(normalized, terminal_types):
         if t:
             terminals[t] = c
     if len(terminals) >= 2:
+        others = [c for c, t in zip(normalized, terminal_types) if t is None]
         options: list[str] = []
         for t, clause in terminals.items():
-            others = [x for x in normalized if _terminal_type(x) is None]
             ordered = " and then ".join(sorted(others + [clause], key=lambda x: _clause_priority(x, file_names)))
             options.append(ordered)
-        raise ValueError(
-            "CLARIFICATION_NEEDED: Your request asks for multiple different final outputs. "
-            "Pick one (click an option below)."
-            + " | OPTIONS: "
-            + json.dumps(options)
+        return _ask(
+            clarification=(
+                "Your request asks for multiple different final outputs. "
+                "Pick one (click an option below)."
+            ),
+            options=options,
         )
 
     ordered_clauses = sorted(normalized, key=lambda x: _clause_priority(x, file_names))
@@ -609,14 +1095,14 @@ def _is_order_clarification(question: str) -> bool:
 def _extract_two_clauses_from_prompt(user_prompt: str) -> tuple[str, str] | None:
     s = _normalize_prompt_for_heuristics(_fix_common_connector_typos(user_prompt))
     s = _insert_missing_and_between_ops(s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _RE_WHITESPACE.sub(" ", s).strip()
     if not s:
         return None
 
-    if re.search(r"\b(and then|then|after|before|first|second|finally)\b", s, re.IGNORECASE):
+    if _has_explicit_order_words(s):
         return None
 
-    parts = re.split(r"\band\b", s, maxsplit=1, flags=re.IGNORECASE)
+    parts = _RE_AND_WORD.split(s, maxsplit=1)
     if len(parts) == 2:
         a = parts[0].strip(" ,.;")
         b = parts[1].strip(" ,.;")
@@ -650,13 +1136,13 @@ def _maybe_order_ambiguity_options(user_prompt: str, file_names: list[str]) -> C
 
     if "split" in ops and not _extract_page_range_tokens(probe):
         if not _is_terminal_intent(user_prompt):
-            return ClarificationResult(
+            return _ask(
                 clarification="Which pages should I split/keep? (example: 1-3)",
                 options=_options_for_pages_question("keep"),
             )
     if "delete" in ops and not _extract_page_range_tokens(probe):
         if not _is_terminal_intent(user_prompt):
-            return ClarificationResult(
+            return _ask(
                 clarification="Which pages should I delete? (example: 2,4-6)",
                 options=_options_for_pages_question("delete"),
             )
@@ -670,9 +1156,9 @@ def _maybe_order_ambiguity_options(user_prompt: str, file_names: list[str]) -> C
             a, b = clauses
             a = _canonicalize_clause(a)
             b = _canonicalize_clause(b)
-            if re.search(r"\b(rotate|turn|straight|flip)\b", a, re.IGNORECASE):
+            if _RE_ROTATE_VERB.search(a.lower()):
                 rotate_clause, compress_clause = a, b
-            elif re.search(r"\b(rotate|turn|straight|flip)\b", b, re.IGNORECASE):
+            elif _RE_ROTATE_VERB.search(b.lower()):
                 rotate_clause, compress_clause = b, a
             else:
                 rotate_clause, compress_clause = "rotate 90 degrees", a
@@ -680,96 +1166,66 @@ def _maybe_order_ambiguity_options(user_prompt: str, file_names: list[str]) -> C
         r1 = clarify_intent(rotate_clause, file_names, last_question="", allow_multi=False)
         r2 = clarify_intent(compress_clause, file_names, last_question="", allow_multi=False)
         if r1.intent and r2.intent and not isinstance(r1.intent, list) and not isinstance(r2.intent, list):
-            return ClarificationResult(intent=[r1.intent, r2.intent])
+            return _ok([r1.intent, r2.intent])
 
-    if "merge" in ops and len(file_names) >= 2:
-        if clauses:
-            a, b = clauses
-            a = _canonicalize_clause(a)
-            b = _canonicalize_clause(b)
-            if re.search(r"\b(merge|combine|join)\b", a, re.IGNORECASE):
-                ordered = f"{a} and then {b}"
-            elif re.search(r"\b(merge|combine|join)\b", b, re.IGNORECASE):
-                ordered = f"{b} and then {a}"
-            else:
-                ordered = f"merge and then {a}"
-            try:
-                intent = ai_parser.parse_intent(ordered, file_names)
-                return ClarificationResult(intent=intent)
-            except Exception:
-                pass
+    if not clauses:
+        return None
 
-    if "ocr" in ops and clauses:
-        a, b = clauses
-        a = _canonicalize_clause(a)
-        b = _canonicalize_clause(b)
-        if "ocr" in a.lower():
+    a, b = clauses
+    a = _canonicalize_clause(a)
+    b = _canonicalize_clause(b)
+    a_low = a.lower()
+    b_low = b.lower()
+
+    # Pick the one ordering the first matching rule prefers (merge, then OCR, then
+    # compress vs convert, then compress last) and ask the LLM once; if that fails,
+    # the user picks the order instead of us trying the next rule's phrasing.
+    ordered = None
+    if "merge" in ops and len(file_names) >= 2:
+        if _RE_MERGE_VERB.search(a_low):
             ordered = f"{a} and then {b}"
-        elif "ocr" in b.lower():
+        elif _RE_MERGE_VERB.search(b_low):
+            ordered = f"{b} and then {a}"
+        else:
+            ordered = f"merge and then {a}"
+    elif "ocr" in ops:
+        if "ocr" in a_low:
+            ordered = f"{a} and then {b}"
+        elif "ocr" in b_low:
             ordered = f"{b} and then {a}"
         else:
             ordered = f"ocr this and then {a}"
-        try:
-            intent = ai_parser.parse_intent(ordered, file_names)
-            return ClarificationResult(intent=intent)
-        except Exception:
-            pass
-
-    if "compress" in ops and ("convert" in ops or "images" in ops):
-        if clauses:
-            a, b = clauses
-            a = _canonicalize_clause(a)
-            b = _canonicalize_clause(b)
-            a_low = a.lower()
-            b_low = b.lower()
-            a_is_compress = "compress" in a_low
-            b_is_compress = "compress" in b_low
+    elif "compress" in ops:
+        a_is_compress = "compress" in a_low
+        b_is_compress = "compress" in b_low
+        if "convert" in ops or "images" in ops:
             if a_is_compress and not b_is_compress:
                 ordered = f"{a} and then {b}"
             elif b_is_compress and not a_is_compress:
                 ordered = f"{b} and then {a}"
             else:
                 ordered = f"compress and then {a}"
-            try:
-                intent = ai_parser.parse_intent(ordered, file_names)
-                return ClarificationResult(intent=intent)
-            except Exception:
-                pass
-
-    if "compress" in ops and clauses:
-        a, b = clauses
-        a = _canonicalize_clause(a)
-        b = _canonicalize_clause(b)
-        a_low = a.lower()
-        b_low = b.lower()
-        a_is_compress = "compress" in a_low
-        b_is_compress = "compress" in b_low
-        if a_is_compress ^ b_is_compress:
+        elif a_is_compress ^ b_is_compress:
             compress_clause = a if a_is_compress else b
             other_clause = b if a_is_compress else a
             ordered = f"{other_clause} and then {compress_clause}"
             fallback = _fallback_parse_two_step_pipeline(ordered, file_names)
             if fallback:
-                return ClarificationResult(intent=fallback)
-            try:
-                intent = ai_parser.parse_intent(ordered, file_names)
-                return ClarificationResult(intent=intent)
-            except Exception:
-                pass
+                return _ok(fallback)
 
-    if clauses:
-        a, b = clauses
-        a = _canonicalize_clause(a)
-        b = _canonicalize_clause(b)
-        options = [f"{a} and then {b}", f"{b} and then {a}"]
-        return ClarificationResult(
-            clarification=(
-                "Which should happen first? (click an option below)"
-            ),
-            options=options,
-        )
+    if ordered:
+        try:
+            intent = ai_parser.parse_intent(ordered, file_names)
+            return _ok(intent)
+        except Exception:
+            pass
 
-    return None
+    return _ask(
+        clarification=(
+            "Which should happen first? (click an option below)"
+        ),
+        options=[f"{a} and then {b}", f"{b} and then {a}"],
+    )
 
 
 def _order_options_from_context(user_prompt: str, question: str) -> list[str] | None:
@@ -779,7 +1235,7 @@ def _order_options_from_context(user_prompt: str, question: str) -> list[str] |
         return [f"{a} and then {b}", f"{b} and then {a}"]
 
     q = (question or "").strip()
-    m = re.search(r"first[^\n]*?['\"]([^'\"]+)['\"][^\n]*?\bor\b\s*([^?\n]+)\??", q, re.IGNORECASE)
+    m = _RE_FIRST_OR_QUESTION.search(q)
     if m:
         a = m.group(1).strip(" ,.;")
         b = m.group(2).strip(" ,.;")
@@ -832,19 +1288,19 @@ def _try_3stage_resolution(user_prompt: str, file_names: list[str], allow_multi:
             try:
                 intent = ai_parser.parse_intent(user_prompt, file_names)
                 if intent:
-                    return ClarificationResult(intent=intent)
+                    return _ok(intent)
             except Exception:
                 pass
         
         if clarification:
             options = clarification.get("options", [])
-            return ClarificationResult(
+            return _ask(
                 clarification=clarification.get("question", "Can you clarify?"),
                 options=options
             )
         
         if parsing and parsing.intent:
-            return ClarificationResult(intent=parsing.intent)
+            return _ok(parsing.intent)
             
     except Exception as e:
         pass
@@ -921,7 +1377,7 @@ def _try_one_flow_resolution(user_prompt: str, file_names: list[str]) -> Clarifi
                 detected_size=f"{matched.target_size_mb}mb" if matched.target_size_mb else None
             )
             
-            return ClarificationResult(
+            return _ask(
                 clarification=response.message,
                 options=[btn.label for btn in response.buttons]
             )
@@ -958,2704 +1414,1619 @@ def _is_terminal_intent(prompt: str) -> bool:
     return False
 
 
-def clarify_intent(user_prompt: str, file_names: list[str], last_question: str = "", allow_multi: bool = True) -> ClarificationResult:
+# Bit flags for the multi-step combo table: one bit per wants_* keyword family,
+# plus bits describing the uploaded files.
+_B_TO_IMAGE = 1 << 0
+_B_TO_PDF = 1 << 1
+_B_TO_DOCX = 1 << 2
+_B_SPLIT = 1 << 3
+_B_DELETE_PAGES = 1 << 4
+_B_MERGE = 1 << 5
+_B_OCR = 1 << 6
+_B_REORDER = 1 << 7
+_B_CLEAN = 1 << 8
+_B_COMPRESS = 1 << 9
+_B_ROTATE = 1 << 10
+_B_WATERMARK = 1 << 11
+_B_PAGE_NUMBERS = 1 << 12
+_B_ENHANCE = 1 << 13
+_B_FLATTEN = 1 << 14
+_B_EXTRACT_TEXT = 1 << 15
+_B_PDF = 1 << 16
+_B_ALL_PDFS = 1 << 17
+_B_IMAGE = 1 << 18
+_B_ALL_IMAGES = 1 << 19
+_B_DOCX = 1 << 20
+_B_MULTI = 1 << 21
+
+_IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp')
+
+
+_FILE_KIND_BY_EXT = {
+    "pdf": _B_PDF,
+    "docx": _B_DOCX,
+    **{ext.lstrip("."): _B_IMAGE for ext in _IMAGE_EXTS},
+}
+
+# Upload kind -> the "every upload is this kind" bit.
+_ALL_KIND_BITS = {_B_PDF: _B_ALL_PDFS, _B_IMAGE: _B_ALL_IMAGES}
+
+
+def _file_kind(file_name: str) -> int:
+    """File-kind bit (_B_PDF, _B_DOCX or _B_IMAGE) for an upload name, 0 if none apply."""
+    _, dot, ext = (file_name or "").rpartition(".")
+    return _FILE_KIND_BY_EXT.get(ext.lower(), 0) if dot else 0
+
+
+# Capability bits that count as a requested operation (to_pdf is a target, not an op).
+_B_OPERATIONS = (
+    _B_MERGE | _B_SPLIT | _B_DELETE_PAGES | _B_COMPRESS | _B_ROTATE
+    | _B_WATERMARK | _B_PAGE_NUMBERS | _B_OCR | _B_ENHANCE | _B_FLATTEN
+    | _B_CLEAN | _B_REORDER | _B_TO_IMAGE | _B_TO_DOCX | _B_EXTRACT_TEXT
+)
+
+# One alternation for all wants_* keyword families. "clean up" is both a clean and an
+# enhance request, so it gets its own group; every other family starts at distinct text.
+_RE_CAPABILITIES = re.compile(
+    r"\b(?:"
+    r"(?P<clean_up>clean\s+up)"
+    r"|(?P<to_image>to\s*img|to\s*image|to\s*images|to\s*png|to\s*jpe?g|as\s*png|as\s*jpe?g|export\s*(?:as\s*)?(?:png|jpe?g|images?))"
+    r"|(?P<to_pdf>to\s*pdf|as\s*pdf|convert\s*(?:to\s*)?pdf)"
+    r"|(?P<to_docx>to\s*docx|to\s*word|as\s*docx|as\s*word|convert\s*(?:to\s*)?(?:docx|word))"
+    r"|(?P<split>split|extract\s*page|keep\s*page)"
+    r"|(?P<delete_pages>delete\s*page|remove\s*page)"
+    r"|(?P<merge>merge|combine|join)"
+    r"|(?P<ocr>ocr)"
+    r"|(?P<reorder>reorder|reverse|swap)"
+    r"|(?P<clean>clean|remove\s*(?:blank|duplicate)|blank\s*page|duplicate\s*page)"
+    r"|(?P<compress>compress|smaller|shrink|reduce\s*size|make\s*small|tiny)"
+    r"|(?P<rotate>rotate|turn|flip|straighten)"
+    r"|(?P<watermark>watermark)"
+    r"|(?P<page_numbers>page\s*numbers?|number\s*pages?|add\s*numbers?)"
+    r"|(?P<enhance>enhance|improve|clarify|sharpen|clean\s*up|fix\s*scan)"
+    r"|(?P<flatten>flatten|sanitize|optimize)"
+    r"|(?P<extract_text>extract\s*text|to\s*txt|as\s*txt|text\s*only|get\s*text)"
+    r")\b"
+)
+
+_CAPABILITY_BITS = {
+    "clean_up": _B_CLEAN | _B_ENHANCE,
+    "to_image": _B_TO_IMAGE,
+    "to_pdf": _B_TO_PDF,
+    "to_docx": _B_TO_DOCX,
+    "split": _B_SPLIT,
+    "delete_pages": _B_DELETE_PAGES,
+    "merge": _B_MERGE,
+    "ocr": _B_OCR,
+    "reorder": _B_REORDER,
+    "clean": _B_CLEAN,
+    "compress": _B_COMPRESS,
+    "rotate": _B_ROTATE,
+    "watermark": _B_WATERMARK,
+    "page_numbers": _B_PAGE_NUMBERS,
+    "enhance": _B_ENHANCE,
+    "flatten": _B_FLATTEN,
+    "extract_text": _B_EXTRACT_TEXT,
+}
+
+
+def _scan_capabilities(prompt_compact: str) -> int:
     """
-    Try to parse the user's intent. Handle common patterns like 'compress to X MB', 'split 1st page', etc.
-    If still ambiguous after pattern detection, provide helpful clarification.
-    
-    INTEGRATION POINTS:
-    1. _fix_common_connector_typos: Uses ErrorClassifier for typo/shorthand correction
-    2. _try_3stage_resolution: Optional 3-stage resolution for ambiguous commands
-    3. Error guards: File-type compatibility checks
-    4. _try_one_flow_resolution: 40K+ pattern One-Flow Resolution (NEW - NON-BREAKING)
-    5. TERMINAL_INTENTS_NO_PARAMS: Guard to skip parameter collection for terminal intents
+    Classify the prompt into wants_* bits in a single pass.
+
+    Each search restarts one character after the previous match start, so a match never
+    hides another family that begins inside it ("remove page numbers" is both
+    delete_pages and page_numbers).
     """
-    
-    one_flow_result = _try_one_flow_resolution(user_prompt, file_names)
-    if one_flow_result is not None:
-        return one_flow_result
-    
-    user_prompt = _fix_common_connector_typos(user_prompt)
-    prompt_for_match = _normalize_prompt_for_heuristics(user_prompt)
-    prompt_compact = prompt_for_match.strip().lower()
+    caps = 0
+    search = _RE_CAPABILITIES.search
+    m = search(prompt_compact)
+    while m is not None:
+        caps |= _CAPABILITY_BITS[m.lastgroup]
+        m = search(prompt_compact, m.start() + 1)
+    return caps
+
+
+@dataclass
+class _ComboContext:
+    """Per-call values the combo builders need"""
+    primary: str
+    file_names: list[str]
+    user_prompt: str
+    prompt_compact: str
+    prompt_for_match: str
+    wm_text: str
+    wm_phrase: str
+    keyword_hits: set[str]
+    num_operations: int
+
+
+def _combo_page_order(ctx: _ComboContext) -> list[int] | str | None:
+    """
+    Page order for a combo's reorder step: "reverse", an explicit list, or None to ask.
 
-    if _is_explicitly_unsupported_request(prompt_for_match):
-        return ClarificationResult(clarification=UNSUPPORTED_REPLY)
-
-    def _is_vague_command(prompt: str) -> bool:
-        """Detect vague/meaningless commands that need clarification."""
-        p = (prompt or "").strip().lower()
-        if not p:
-            return True
-        if len(p) < 3:
-            return True
-        vague_patterns = [
-            r"^do\s*(it|this|that)?$",
-            r"^why\s*(not)?$",
-            r"^ok(ay)?$",
-            r"^yes$",
-            r"^no$",
-            r"^sure$",
-            r"^go\s*(ahead)?$",
-            r"^start$",
-            r"^run$",
-            r"^execute$",
-            r"^process$",
-            r"^proceed$",
-            r"^begin$",
-            r"^make\s*it$",
-            r"^fix\s*(it)?$",
-            r"^help$",
-            r"^what$",
-            r"^how$",
-            r"^huh$",
-            r"^eh$",
-            r"^idk$",
-            r"^dunno$",
-            r"^whatever$",
-        ]
-        for pattern in vague_patterns:
-            if re.match(pattern, p):
-                return True
-        recognizable_words = [
-            "merge", "combine", "join", "split", "extract", "keep", "delete", "remove",
-            "compress", "reduce", "shrink", "small", "convert", "pdf", "docx", "word",
-            "png", "jpg", "jpeg", "image", "rotate", "turn", "flip", "reorder", "swap",
-            "reverse", "watermark", "page", "number", "ocr", "scan", "enhance", "flatten",
-            "optimize", "text", "to", "into", "as", "from", "all", "first", "last"
-        ]
-        has_recognizable = any(word in p for word in recognizable_words)
-        if not has_recognizable and len(p.split()) <= 3:
-            return True
-        return False
+    A single page ("swap pages 1 and 2" only yields 1) is never a full order, so it asks too.
+    """
+    if "reverse" in ctx.keyword_hits:
+        return "reverse"
+    m = _RE_COMBO_REORDER_ORDER.search(ctx.prompt_compact)
+    if not m:
+        return None
+    order = [int(x) for x in m.group(1).replace(",", " ").split()]
+    if len(order) < 2 or 0 in order or len(set(order)) != len(order):
+        return None
+    return order
 
-    if _is_vague_command(prompt_compact) and file_names:
-        primary = file_names[0]
-        primary_lower = (primary or "").lower()
-        
-        if primary_lower.endswith('.pdf'):
-            if len(file_names) >= 2:
-                options = ["merge all files", "compress files", "split first page"]
-            else:
-                options = ["compress", "split first page", "convert to docx", "rotate 90 degrees"]
-            return ClarificationResult(
-                clarification="What would you like to do with your PDF? Here are some options:",
-                options=options
-            )
-        elif primary_lower.endswith(('.png', '.jpg', '.jpeg')):
-            if len(file_names) >= 2:
-                options = ["combine into PDF", "convert to docx", "enhance images"]
-            else:
-                options = ["convert to PDF", "convert to docx", "enhance", "OCR to searchable PDF"]
-            return ClarificationResult(
-                clarification="What would you like to do with your image? Here are some options:",
-                options=options
-            )
-        elif primary_lower.endswith('.docx'):
-            options = ["convert to PDF", "convert to images"]
-            return ClarificationResult(
-                clarification="What would you like to do with your DOCX? Here are some options:",
-                options=options
-            )
-        else:
-            return ClarificationResult(
-                clarification="What would you like to do? Please describe the operation (e.g., 'compress', 'merge', 'convert to pdf').",
-                options=["compress", "merge", "convert to pdf"]
-            )
 
-    if file_names:
-        primary = file_names[0]
-        primary_lower = (primary or "").lower()
-        is_image_file = primary_lower.endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp'))
-        is_pdf_file = primary_lower.endswith('.pdf')
-        is_docx_file = primary_lower.endswith('.docx')
-        all_images = all(f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp')) for f in file_names)
-        all_pdfs = all(f.lower().endswith('.pdf') for f in file_names)
-        num_files = len(file_names)
-        
-        wants_to_image = bool(re.search(r"\b(to\s*img|to\s*image|to\s*images|to\s*png|to\s*jpe?g|as\s*png|as\s*jpe?g|export\s*(as\s*)?(png|jpe?g|images?))\b", prompt_compact))
-        wants_to_pdf = bool(re.search(r"\b(to\s*pdf|as\s*pdf|convert\s*(to\s*)?pdf)\b", prompt_compact))
-        wants_to_docx = bool(re.search(r"\b(to\s*docx|to\s*word|as\s*docx|as\s*word|convert\s*(to\s*)?(docx|word))\b", prompt_compact))
-        wants_split = bool(re.search(r"\b(split|extract\s*page|keep\s*page)\b", prompt_compact))
-        wants_delete_pages = bool(re.search(r"\b(delete\s*page|remove\s*page)\b", prompt_compact))
-        wants_merge = bool(re.search(r"\b(merge|combine|join)\b", prompt_compact))
-        wants_ocr = bool(re.search(r"\bocr\b", prompt_compact))
-        wants_reorder = bool(re.search(r"\b(reorder|reverse|swap)\b", prompt_compact))
-        wants_clean = bool(re.search(r"\b(clean|remove\s*(blank|duplicate)|blank\s*page|duplicate\s*page)\b", prompt_compact))
-        wants_compress = bool(re.search(r"\b(compress|smaller|shrink|reduce\s*size|make\s*small|tiny)\b", prompt_compact))
-        wants_rotate = bool(re.search(r"\b(rotate|turn|flip|straighten)\b", prompt_compact))
-        wants_watermark = bool(re.search(r"\bwatermark\b", prompt_compact))
-        wants_page_numbers = bool(re.search(r"\b(page\s*numbers?|number\s*pages?|add\s*numbers?)\b", prompt_compact))
-        wants_enhance = bool(re.search(r"\b(enhance|improve|clarify|sharpen|clean\s*up|fix\s*scan)\b", prompt_compact))
-        wants_flatten = bool(re.search(r"\b(flatten|sanitize|optimize)\b", prompt_compact))
-        wants_extract_text = bool(re.search(r"\b(extract\s*text|to\s*txt|as\s*txt|text\s*only|get\s*text)\b", prompt_compact))
-        
-        num_operations = sum([
-            wants_merge, wants_split, wants_delete_pages, wants_compress, wants_rotate,
-            wants_watermark, wants_page_numbers, wants_ocr, wants_enhance, wants_flatten,
-            wants_clean, wants_reorder, wants_to_image, wants_to_docx, wants_extract_text
+def _combo_pdf_merge_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_merge(ctx.file_names),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_merge_watermark(ctx: _ComboContext) -> ClarificationResult | None:
+    text = ctx.wm_text
+    if text:
+        return _ok([
+            _pi_merge(ctx.file_names),
+            _pi_watermark(ctx.primary, text),
         ])
-        
-        if is_pdf_file or all_pdfs:
-            
-            if wants_merge and wants_compress and all_pdfs and num_files >= 2:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="merge",
-                            merge={"operation": "merge", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_merge and wants_watermark and all_pdfs and num_files >= 2:
-                m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(\S+)", user_prompt, re.IGNORECASE)
-                text = (m.group(1).strip() if m else "").strip("\"'")
-                if text:
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="merge",
-                                merge={"operation": "merge", "files": file_names},
-                            ),
-                            ParsedIntent(
-                                operation_type="watermark",
-                                watermark={"operation": "watermark", "file": primary, "text": text},
-                            ),
-                        ]
-                    )
-            
-            if wants_ocr and wants_compress and is_pdf_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_enhance and wants_ocr and is_pdf_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                    ]
-                )
-            
-            if wants_enhance and wants_compress and is_pdf_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_rotate and wants_compress and is_pdf_file:
-                degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                    degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
-                    degrees = 180
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="rotate",
-                            rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_flatten and wants_compress and is_pdf_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_clean and wants_compress and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
-                op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type=op_type,
-                            **{op_type: {"operation": op_type, "file": primary}},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_watermark and wants_compress and is_pdf_file:
-                m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(\S+)", user_prompt, re.IGNORECASE)
-                text = (m.group(1).strip() if m else "").strip("\"'")
-                if text:
-                    preset = _infer_compress_preset(user_prompt)
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="watermark",
-                                watermark={"operation": "watermark", "file": primary, "text": text},
-                            ),
-                            ParsedIntent(
-                                operation_type="compress",
-                                compress={"operation": "compress", "file": primary, "preset": preset},
-                            ),
-                        ]
-                    )
-            
-            if wants_page_numbers and wants_compress and is_pdf_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="page_numbers",
-                            page_numbers={"operation": "page_numbers", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_split and wants_compress and is_pdf_file:
-                pages = _parse_page_ranges(user_prompt)
-                if pages:
-                    preset = _infer_compress_preset(user_prompt)
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="split",
-                                split={"operation": "split", "file": primary, "pages": pages},
-                            ),
-                            ParsedIntent(
-                                operation_type="compress",
-                                compress={"operation": "compress", "file": primary, "preset": preset},
-                            ),
-                        ]
-                    )
-            
-            if wants_watermark and wants_page_numbers and is_pdf_file:
-                m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(\S+)", user_prompt, re.IGNORECASE)
-                text = (m.group(1).strip() if m else "").strip("\"'")
-                if text:
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="watermark",
-                                watermark={"operation": "watermark", "file": primary, "text": text},
-                            ),
-                            ParsedIntent(
-                                operation_type="page_numbers",
-                                page_numbers={"operation": "page_numbers", "file": primary},
-                            ),
-                        ]
-                    )
-            
-            if wants_rotate and wants_split and is_pdf_file:
-                pages = _parse_page_ranges(user_prompt)
-                degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                    degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
-                    degrees = 180
-                if pages:
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="rotate",
-                                rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                            ),
-                            ParsedIntent(
-                                operation_type="split",
-                                split={"operation": "split", "file": primary, "pages": pages},
-                            ),
-                        ]
-                    )
-            
-            if wants_merge and wants_ocr and all_pdfs and num_files >= 2:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="merge",
-                            merge={"operation": "merge", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                    ]
-                )
-            
-            if wants_merge and wants_enhance and all_pdfs and num_files >= 2:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="merge",
-                            merge={"operation": "merge", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_merge and wants_flatten and all_pdfs and num_files >= 2:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="merge",
-                            merge={"operation": "merge", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_merge and wants_page_numbers and all_pdfs and num_files >= 2:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="merge",
-                            merge={"operation": "merge", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="page_numbers",
-                            page_numbers={"operation": "page_numbers", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_merge and wants_rotate and all_pdfs and num_files >= 2:
-                degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                    degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
-                    degrees = 180
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="merge",
-                            merge={"operation": "merge", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="rotate",
-                            rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                        ),
-                    ]
-                )
-            
-            if wants_merge and wants_clean and all_pdfs and num_files >= 2:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
-                op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="merge",
-                            merge={"operation": "merge", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type=op_type,
-                            **{op_type: {"operation": op_type, "file": primary}},
-                        ),
-                    ]
-                )
-            
-            if wants_ocr and wants_flatten and is_pdf_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_ocr and wants_page_numbers and is_pdf_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="page_numbers",
-                            page_numbers={"operation": "page_numbers", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_ocr and wants_clean and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
-                op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type=op_type,
-                            **{op_type: {"operation": op_type, "file": primary}},
-                        ),
-                    ]
-                )
-            
-            if wants_ocr and wants_rotate and is_pdf_file:
-                degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                    degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
-                    degrees = 180
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="rotate",
-                            rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                        ),
-                    ]
-                )
-            
-            if wants_clean and wants_reorder and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
-                op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
-                is_reverse = bool(re.search(r"\breverse\b", prompt_compact))
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type=op_type,
-                            **{op_type: {"operation": op_type, "file": primary}},
-                        ),
-                        ParsedIntent(
-                            operation_type="reorder",
-                            reorder={"operation": "reorder", "file": primary, "new_order": "reverse" if is_reverse else None},
-                        ),
-                    ]
-                )
-            
-            if wants_clean and wants_flatten and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
-                op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type=op_type,
-                            **{op_type: {"operation": op_type, "file": primary}},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_page_numbers and wants_flatten and is_pdf_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="page_numbers",
-                            page_numbers={"operation": "page_numbers", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_watermark and wants_flatten and is_pdf_file:
-                m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(\S+)", user_prompt, re.IGNORECASE)
-                text = (m.group(1).strip() if m else "").strip("\"'")
-                if text:
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="watermark",
-                                watermark={"operation": "watermark", "file": primary, "text": text},
-                            ),
-                            ParsedIntent(
-                                operation_type="flatten_pdf",
-                                flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                            ),
-                        ]
-                    )
-            
-            if wants_rotate and wants_reorder and is_pdf_file:
-                degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                    degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
-                    degrees = 180
-                is_reverse = bool(re.search(r"\breverse\b", prompt_compact))
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="rotate",
-                            rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                        ),
-                        ParsedIntent(
-                            operation_type="reorder",
-                            reorder={"operation": "reorder", "file": primary, "new_order": "reverse" if is_reverse else None},
-                        ),
-                    ]
-                )
-            
-            
-            if wants_enhance and wants_ocr and wants_compress and is_pdf_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_clean and wants_ocr and wants_compress and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
-                op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type=op_type,
-                            **{op_type: {"operation": op_type, "file": primary}},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_merge and wants_clean and wants_compress and all_pdfs and num_files >= 2:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
-                op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="merge",
-                            merge={"operation": "merge", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type=op_type,
-                            **{op_type: {"operation": op_type, "file": primary}},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_merge and wants_rotate and wants_compress and all_pdfs and num_files >= 2:
-                degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                    degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
-                    degrees = 180
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="merge",
-                            merge={"operation": "merge", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="rotate",
-                            rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_merge and wants_ocr and wants_compress and all_pdfs and num_files >= 2:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="merge",
-                            merge={"operation": "merge", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_ocr and wants_page_numbers and wants_compress and is_pdf_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="page_numbers",
-                            page_numbers={"operation": "page_numbers", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_rotate and wants_page_numbers and wants_compress and is_pdf_file:
-                degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                    degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
-                    degrees = 180
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="rotate",
-                            rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                        ),
-                        ParsedIntent(
-                            operation_type="page_numbers",
-                            page_numbers={"operation": "page_numbers", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_merge and wants_watermark and wants_compress and all_pdfs and num_files >= 2:
-                m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(\S+)", user_prompt, re.IGNORECASE)
-                text = (m.group(1).strip() if m else "").strip("\"'")
-                if text:
-                    preset = _infer_compress_preset(user_prompt)
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="merge",
-                                merge={"operation": "merge", "files": file_names},
-                            ),
-                            ParsedIntent(
-                                operation_type="watermark",
-                                watermark={"operation": "watermark", "file": primary, "text": text},
-                            ),
-                            ParsedIntent(
-                                operation_type="compress",
-                                compress={"operation": "compress", "file": primary, "preset": preset},
-                            ),
-                        ]
-                    )
-            
-            if wants_enhance and wants_flatten and wants_compress and is_pdf_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_clean and wants_flatten and wants_compress and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
-                op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type=op_type,
-                            **{op_type: {"operation": op_type, "file": primary}},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-        
-        if is_image_file or all_images:
-            
-            if wants_to_docx and (is_image_file or all_images):
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="pdf_to_docx",
-                            pdf_to_docx={"operation": "pdf_to_docx", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if (wants_merge or wants_to_pdf) and wants_compress and all_images:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if (wants_merge or wants_to_pdf) and wants_watermark and all_images:
-                m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(\S+)", user_prompt, re.IGNORECASE)
-                text = (m.group(1).strip() if m else "").strip("\"'")
-                if text:
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="images_to_pdf",
-                                images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                            ),
-                            ParsedIntent(
-                                operation_type="watermark",
-                                watermark={"operation": "watermark", "file": primary, "text": text},
-                            ),
-                        ]
-                    )
-            
-            if (wants_merge or wants_to_pdf) and wants_page_numbers and all_images:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="page_numbers",
-                            page_numbers={"operation": "page_numbers", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_enhance and wants_ocr and is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                    ]
-                )
-            
-            if wants_enhance and wants_to_pdf and is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                    ]
-                )
-            
-            if wants_enhance and wants_compress and is_image_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if (wants_merge or wants_to_pdf) and wants_rotate and all_images:
-                degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                    degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
-                    degrees = 180
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="rotate",
-                            rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                        ),
-                    ]
-                )
-            
-            if (wants_merge or wants_to_pdf) and wants_ocr and all_images:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                    ]
-                )
-            
-            if (wants_merge or wants_to_pdf) and wants_flatten and all_images:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_ocr and wants_compress and is_image_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_ocr and wants_page_numbers and is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="page_numbers",
-                            page_numbers={"operation": "page_numbers", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_ocr and wants_flatten and is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_enhance and wants_rotate and is_image_file:
-                degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                    degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
-                    degrees = 180
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="rotate",
-                            rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                        ),
-                    ]
-                )
-            
-            
-            if wants_enhance and wants_ocr and wants_compress and is_image_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if (wants_merge or wants_to_pdf) and wants_ocr and wants_compress and all_images:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if (wants_merge or wants_to_pdf) and wants_rotate and wants_compress and all_images:
-                degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                    degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
-                    degrees = 180
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="rotate",
-                            rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_enhance and wants_ocr and wants_page_numbers and is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="page_numbers",
-                            page_numbers={"operation": "page_numbers", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if (wants_merge or wants_to_pdf) and wants_watermark and wants_compress and all_images:
-                m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(\S+)", user_prompt, re.IGNORECASE)
-                text = (m.group(1).strip() if m else "").strip("\"'")
-                if text:
-                    preset = _infer_compress_preset(user_prompt)
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="images_to_pdf",
-                                images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                            ),
-                            ParsedIntent(
-                                operation_type="watermark",
-                                watermark={"operation": "watermark", "file": primary, "text": text},
-                            ),
-                            ParsedIntent(
-                                operation_type="compress",
-                                compress={"operation": "compress", "file": primary, "preset": preset},
-                            ),
-                        ]
-                    )
-            
-            if wants_ocr and wants_rotate and wants_compress and is_image_file:
-                degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                    degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
-                    degrees = 180
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="rotate",
-                            rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-        
-        if is_docx_file:
-            
-            if wants_to_image and not wants_compress:
-                fmt = "png"
-                if re.search(r"\bjpe?g\b|\bjpg\b", prompt_for_match, re.IGNORECASE):
-                    fmt = "jpg"
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="pdf_to_images",
-                            pdf_to_images={"operation": "pdf_to_images", "file": primary, "format": fmt, "dpi": 150},
-                        ),
-                    ]
-                )
-            
-            if wants_to_pdf and wants_compress:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_to_pdf and wants_watermark:
-                m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(\S+)", user_prompt, re.IGNORECASE)
-                text = (m.group(1).strip() if m else "").strip("\"'")
-                if text:
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="docx_to_pdf",
-                                docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                            ),
-                            ParsedIntent(
-                                operation_type="watermark",
-                                watermark={"operation": "watermark", "file": primary, "text": text},
-                            ),
-                        ]
-                    )
-            
-            if wants_to_pdf and wants_page_numbers:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="page_numbers",
-                            page_numbers={"operation": "page_numbers", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_to_image and wants_compress:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="pdf_to_images",
-                            pdf_to_images={"operation": "pdf_to_images", "file": primary, "format": "jpg", "dpi": 100},
-                        ),
-                    ]
-                )
-            
-            if wants_delete_pages:
-                pages = _parse_page_ranges(user_prompt)
-                if pages:
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="docx_to_pdf",
-                                docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                            ),
-                            ParsedIntent(
-                                operation_type="delete",
-                                delete={"operation": "delete", "file": primary, "pages_to_delete": pages},
-                            ),
-                        ]
-                    )
-                else:
-                    return ClarificationResult(
-                        clarification="Which pages do you want to delete? (Will convert to PDF first)",
-                        options=["delete page 1", "delete pages 2-3", "delete last page"]
-                    )
-            
-            if wants_to_pdf and wants_flatten:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                    ]
-                )
-            
-            if wants_clean and wants_compress:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
-                op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type=op_type,
-                            **{op_type: {"operation": op_type, "file": primary}},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_enhance and wants_compress:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            
-            if wants_to_pdf and wants_ocr and wants_compress:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_to_pdf and wants_watermark and wants_compress:
-                m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(\S+)", user_prompt, re.IGNORECASE)
-                text = (m.group(1).strip() if m else "").strip("\"'")
-                if text:
-                    preset = _infer_compress_preset(user_prompt)
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="docx_to_pdf",
-                                docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                            ),
-                            ParsedIntent(
-                                operation_type="watermark",
-                                watermark={"operation": "watermark", "file": primary, "text": text},
-                            ),
-                            ParsedIntent(
-                                operation_type="compress",
-                                compress={"operation": "compress", "file": primary, "preset": preset},
-                            ),
-                        ]
-                    )
-            
-            if wants_to_pdf and wants_page_numbers and wants_compress:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="page_numbers",
-                            page_numbers={"operation": "page_numbers", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            
-            if wants_to_pdf and wants_flatten and wants_compress:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-        
-        
-        if is_image_file and wants_to_image and not wants_to_pdf and not wants_compress:
-            return ClarificationResult(clarification="This file is already an image. Try 'compress', 'to pdf', or 'rotate' instead.")
-        
-        if is_pdf_file and wants_to_pdf and num_operations <= 1:
-            return ClarificationResult(clarification="This file is already a PDF. Try 'compress', 'to docx', or 'to images' instead.")
-        
-        if is_docx_file and wants_to_docx:
-            return ClarificationResult(clarification="This file is already a Word document. Try 'to pdf' to convert it.")
-        
-        
-        if wants_merge and all_images and num_files >= 1:
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="images_to_pdf",
-                    images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                )
-            )
-        
-        if wants_to_pdf and all_images:
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="images_to_pdf",
-                    images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                )
-            )
-        
-        if wants_to_pdf and is_docx_file:
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="docx_to_pdf",
-                    docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                )
-            )
-        
-        if wants_ocr and is_image_file:
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="ocr",
-                    ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                )
-            )
-        
-        if wants_extract_text and is_image_file:
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="ocr",
-                    ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                )
-            )
-        
-        if wants_enhance and is_image_file:
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="enhance_scan",
-                    enhance_scan={"operation": "enhance_scan", "file": primary},
-                )
-            )
-        
-        
-        if wants_to_image and is_docx_file:
-            return ClarificationResult(
-                intent=[
-                    ParsedIntent(
-                        operation_type="docx_to_pdf",
-                        docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                    ),
-                    ParsedIntent(
-                        operation_type="pdf_to_images",
-                        pdf_to_images={"operation": "pdf_to_images", "file": primary, "format": "png", "dpi": 150},
-                    ),
-                ]
-            )
-        
-        if wants_split and is_docx_file:
-            pages = _parse_page_ranges(user_prompt)
-            if pages:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="split",
-                            split={"operation": "split", "file": primary, "pages": pages},
-                        ),
-                    ]
-                )
-            else:
-                return ClarificationResult(
-                    clarification="Which pages do you want after converting to PDF?",
-                    options=["pages 1", "pages 1-3", "all pages as separate PDFs"]
-                )
-        
-        if wants_compress and is_docx_file:
-            preset = _infer_compress_preset(user_prompt)
-            return ClarificationResult(
-                intent=[
-                    ParsedIntent(
-                        operation_type="docx_to_pdf",
-                        docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                    ),
-                    ParsedIntent(
-                        operation_type="compress",
-                        compress={"operation": "compress", "file": primary, "preset": preset},
-                    ),
-                ]
-            )
-        
-        if wants_watermark and is_docx_file:
-            m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(.+)$", user_prompt, re.IGNORECASE)
-            text = (m.group(1).strip() if m else "").strip("\"'")
-            if text:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="watermark",
-                            watermark={"operation": "watermark", "file": primary, "text": text},
-                        ),
-                    ]
-                )
+    return None
+
+
+def _combo_ocr_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_ocr(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_enhance_ocr(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok(_pi_file_ops(ctx.primary, _PIPE_ENHANCE_OCR))
+
+
+def _combo_pdf_enhance_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_enhance_scan(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_rotate_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    degrees = _rotation_degrees(ctx.prompt_compact)
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_rotate(ctx.primary, degrees),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_flatten_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_flatten_pdf(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_clean_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    is_duplicate = "duplicate" in ctx.keyword_hits
+    op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_file_op(op_type, ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_watermark_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    text = ctx.wm_text
+    if text:
+        preset = _infer_compress_preset(ctx.user_prompt)
+        return _ok([
+            _pi_watermark(ctx.primary, text),
+            _pi_compress(ctx.primary, preset),
+        ])
+    return None
+
+
+def _combo_pdf_page_numbers_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_page_numbers(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_split_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    pages = _parse_page_ranges(ctx.user_prompt)
+    if pages:
+        preset = _infer_compress_preset(ctx.user_prompt)
+        return _ok([
+            _pi_split(ctx.primary, pages),
+            _pi_compress(ctx.primary, preset),
+        ])
+    return None
+
+
+def _combo_pdf_watermark_page_numbers(ctx: _ComboContext) -> ClarificationResult | None:
+    text = ctx.wm_text
+    if text:
+        return _ok([
+            _pi_watermark(ctx.primary, text),
+            _pi_page_numbers(ctx.primary),
+        ])
+    return None
+
+
+def _combo_pdf_rotate_split(ctx: _ComboContext) -> ClarificationResult | None:
+    pages = _parse_page_ranges(ctx.user_prompt)
+    degrees = _rotation_degrees(ctx.prompt_compact)
+    if pages:
+        return _ok([
+            _pi_rotate(ctx.primary, degrees),
+            _pi_split(ctx.primary, pages),
+        ])
+    return None
+
+
+def _combo_pdf_merge_ocr(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        _pi_merge(ctx.file_names),
+        _pi_ocr(ctx.primary),
+    ])
+
+
+def _combo_pdf_merge_enhance(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        _pi_merge(ctx.file_names),
+        _pi_enhance_scan(ctx.primary),
+    ])
+
+
+def _combo_pdf_merge_flatten(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        _pi_merge(ctx.file_names),
+        _pi_flatten_pdf(ctx.primary),
+    ])
+
+
+def _combo_pdf_merge_page_numbers(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        _pi_merge(ctx.file_names),
+        _pi_page_numbers(ctx.primary),
+    ])
+
+
+def _combo_pdf_merge_rotate(ctx: _ComboContext) -> ClarificationResult | None:
+    degrees = _rotation_degrees(ctx.prompt_compact)
+    return _ok([
+        _pi_merge(ctx.file_names),
+        _pi_rotate(ctx.primary, degrees),
+    ])
+
+
+def _combo_pdf_merge_clean(ctx: _ComboContext) -> ClarificationResult | None:
+    is_duplicate = "duplicate" in ctx.keyword_hits
+    op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
+    return _ok([
+        _pi_merge(ctx.file_names),
+        _pi_file_op(op_type, ctx.primary),
+    ])
+
+
+def _combo_ocr_flatten(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok(_pi_file_ops(ctx.primary, _PIPE_OCR_FLATTEN))
+
+
+def _combo_ocr_page_numbers(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok(_pi_file_ops(ctx.primary, _PIPE_OCR_PAGE_NUMBERS))
+
+
+def _combo_pdf_ocr_clean(ctx: _ComboContext) -> ClarificationResult | None:
+    is_duplicate = "duplicate" in ctx.keyword_hits
+    op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
+    return _ok([
+        _pi_ocr(ctx.primary),
+        _pi_file_op(op_type, ctx.primary),
+    ])
+
+
+def _combo_pdf_ocr_rotate(ctx: _ComboContext) -> ClarificationResult | None:
+    degrees = _rotation_degrees(ctx.prompt_compact)
+    return _ok([
+        _pi_ocr(ctx.primary),
+        _pi_rotate(ctx.primary, degrees),
+    ])
+
+
+def _combo_pdf_clean_reorder(ctx: _ComboContext) -> ClarificationResult | None:
+    # "clean up" sets both the clean and enhance bits, so it only counts once here.
+    max_operations = 3 if _RE_CLEAN_UP.search(ctx.prompt_compact) else 2
+    if ctx.num_operations > max_operations:
+        return _DEFER_TO_MULTI_STEP
+    is_duplicate = "duplicate" in ctx.keyword_hits
+    op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
+    new_order = _combo_page_order(ctx)
+    if new_order is None:
+        step = "remove duplicate pages" if op_type == "remove_duplicate_pages" else "remove blank pages"
+        return _ask(
+            clarification="What page order after cleaning? (example: 2,1,3)",
+            options=[f"{step} and reverse all pages", f"{step} and reorder pages to 2,1,3"],
+        )
+    if new_order == "reverse":
+        return _ok([
+            _pi_file_op(op_type, ctx.primary),
+            _pi_reorder(ctx.primary, new_order),
+        ])
+    # Explicit page numbers refer to the uploaded file, so reorder before pages are removed.
+    return _ok([
+        _pi_reorder(ctx.primary, new_order),
+        _pi_file_op(op_type, ctx.primary),
+    ])
+
+
+def _combo_pdf_clean_flatten(ctx: _ComboContext) -> ClarificationResult | None:
+    is_duplicate = "duplicate" in ctx.keyword_hits
+    op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
+    return _ok([
+        _pi_file_op(op_type, ctx.primary),
+        _pi_flatten_pdf(ctx.primary),
+    ])
+
+
+def _combo_pdf_page_numbers_flatten(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        _pi_page_numbers(ctx.primary),
+        _pi_flatten_pdf(ctx.primary),
+    ])
+
+
+def _combo_pdf_watermark_flatten(ctx: _ComboContext) -> ClarificationResult | None:
+    text = ctx.wm_text
+    if text:
+        return _ok([
+            _pi_watermark(ctx.primary, text),
+            _pi_flatten_pdf(ctx.primary),
+        ])
+    return None
+
+
+def _combo_pdf_rotate_reorder(ctx: _ComboContext) -> ClarificationResult | None:
+    if ctx.num_operations > 2:
+        return _DEFER_TO_MULTI_STEP
+    degrees = _rotation_degrees(ctx.prompt_compact, allow_270=True)
+    new_order = _combo_page_order(ctx)
+    if new_order is None:
+        return _ask(
+            clarification="What page order after rotating? (example: 2,1,3)",
+            options=[f"rotate {degrees} and reverse all pages", f"rotate {degrees} and reorder pages to 2,1,3"],
+        )
+    return _ok([
+        _pi_rotate(ctx.primary, degrees),
+        _pi_reorder(ctx.primary, new_order),
+    ])
+
+
+def _combo_enhance_ocr_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        *_pi_file_ops(ctx.primary, _PIPE_ENHANCE_OCR),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_clean_ocr_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    is_duplicate = "duplicate" in ctx.keyword_hits
+    op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_file_op(op_type, ctx.primary),
+        _pi_ocr(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_merge_clean_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    is_duplicate = "duplicate" in ctx.keyword_hits
+    op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_merge(ctx.file_names),
+        _pi_file_op(op_type, ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_merge_rotate_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    degrees = _rotation_degrees(ctx.prompt_compact)
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_merge(ctx.file_names),
+        _pi_rotate(ctx.primary, degrees),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_merge_ocr_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_merge(ctx.file_names),
+        _pi_ocr(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_ocr_page_numbers_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        *_pi_file_ops(ctx.primary, _PIPE_OCR_PAGE_NUMBERS),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_rotate_page_numbers_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    degrees = _rotation_degrees(ctx.prompt_compact)
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_rotate(ctx.primary, degrees),
+        _pi_page_numbers(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_merge_watermark_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    text = ctx.wm_text
+    if text:
+        preset = _infer_compress_preset(ctx.user_prompt)
+        return _ok([
+            _pi_merge(ctx.file_names),
+            _pi_watermark(ctx.primary, text),
+            _pi_compress(ctx.primary, preset),
+        ])
+    return None
+
+
+def _combo_pdf_enhance_flatten_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_enhance_scan(ctx.primary),
+        _pi_flatten_pdf(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_pdf_clean_flatten_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    is_duplicate = "duplicate" in ctx.keyword_hits
+    op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_file_op(op_type, ctx.primary),
+        _pi_flatten_pdf(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_image_to_docx(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_pdf_to_docx(ctx.primary),
+    ])
+
+
+def _combo_image_to_pdf_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_image_to_pdf_watermark(ctx: _ComboContext) -> ClarificationResult | None:
+    text = ctx.wm_text
+    if text:
+        return _ok([
+            _pi_images_to_pdf(ctx.file_names),
+            _pi_watermark(ctx.primary, text),
+        ])
+    return None
+
+
+def _combo_image_to_pdf_page_numbers(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_page_numbers(ctx.primary),
+    ])
+
+
+def _combo_image_enhance_to_pdf(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        _pi_enhance_scan(ctx.primary),
+        _pi_images_to_pdf(ctx.file_names),
+    ])
+
+
+def _combo_image_enhance_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_enhance_scan(ctx.primary),
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_image_to_pdf_rotate(ctx: _ComboContext) -> ClarificationResult | None:
+    degrees = _rotation_degrees(ctx.prompt_compact)
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_rotate(ctx.primary, degrees),
+    ])
+
+
+def _combo_image_to_pdf_ocr(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_ocr(ctx.primary),
+    ])
+
+
+def _combo_image_to_pdf_flatten(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_flatten_pdf(ctx.primary),
+    ])
+
+
+def _combo_image_enhance_rotate(ctx: _ComboContext) -> ClarificationResult | None:
+    degrees = _rotation_degrees(ctx.prompt_compact)
+    return _ok([
+        _pi_enhance_scan(ctx.primary),
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_rotate(ctx.primary, degrees),
+    ])
+
+
+def _combo_image_to_pdf_ocr_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_ocr(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_image_to_pdf_rotate_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    degrees = _rotation_degrees(ctx.prompt_compact)
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_rotate(ctx.primary, degrees),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_image_enhance_ocr_page_numbers(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        *_pi_file_ops(ctx.primary, _PIPE_ENHANCE_OCR),
+        _pi_page_numbers(ctx.primary),
+    ])
+
+
+def _combo_image_to_pdf_watermark_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    text = ctx.wm_text
+    if text:
+        preset = _infer_compress_preset(ctx.user_prompt)
+        return _ok([
+            _pi_images_to_pdf(ctx.file_names),
+            _pi_watermark(ctx.primary, text),
+            _pi_compress(ctx.primary, preset),
+        ])
+    return None
+
+
+def _combo_image_ocr_rotate_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    degrees = _rotation_degrees(ctx.prompt_compact)
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_ocr(ctx.primary),
+        _pi_rotate(ctx.primary, degrees),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_docx_to_image(ctx: _ComboContext) -> ClarificationResult | None:
+    fmt = "png"
+    if _RE_JPG.search(ctx.prompt_compact):
+        fmt = "jpg"
+    return _ok([
+        _pi_docx_to_pdf(ctx.primary),
+        _pi_pdf_to_images(ctx.primary, fmt),
+    ])
+
+
+def _combo_docx_to_pdf_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_docx_to_pdf(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_docx_to_pdf_watermark(ctx: _ComboContext) -> ClarificationResult | None:
+    text = ctx.wm_text
+    if text:
+        return _ok([
+            _pi_docx_to_pdf(ctx.primary),
+            _pi_watermark(ctx.primary, text),
+        ])
+    return None
+
+
+def _combo_docx_to_pdf_page_numbers(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok(_pi_file_ops(ctx.primary, _PIPE_DOCX_PAGE_NUMBERS))
+
+
+def _combo_docx_to_image_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok([
+        _pi_docx_to_pdf(ctx.primary),
+        _pi_pdf_to_images(ctx.primary, "jpg", dpi=100),
+    ])
+
+
+def _combo_docx_delete_pages(ctx: _ComboContext) -> ClarificationResult | None:
+    pages = _parse_page_ranges(ctx.user_prompt)
+    if pages:
+        return _ok([
+            _pi_docx_to_pdf(ctx.primary),
+            _pi_delete(ctx.primary, pages),
+        ])
+    else:
+        return _ask(
+            clarification="Which pages do you want to delete? (Will convert to PDF first)",
+            options=["delete page 1", "delete pages 2-3", "delete last page"]
+        )
+    return None
+
+
+def _combo_docx_to_pdf_flatten(ctx: _ComboContext) -> ClarificationResult | None:
+    return _ok(_pi_file_ops(ctx.primary, _PIPE_DOCX_FLATTEN))
+
+
+def _combo_docx_clean_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    is_duplicate = "duplicate" in ctx.keyword_hits
+    op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_docx_to_pdf(ctx.primary),
+        _pi_file_op(op_type, ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_docx_enhance_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_docx_to_pdf(ctx.primary),
+        _pi_enhance_scan(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_docx_to_pdf_ocr_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_docx_to_pdf(ctx.primary),
+        _pi_ocr(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_docx_to_pdf_watermark_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    text = ctx.wm_text
+    if text:
+        preset = _infer_compress_preset(ctx.user_prompt)
+        return _ok([
+            _pi_docx_to_pdf(ctx.primary),
+            _pi_watermark(ctx.primary, text),
+            _pi_compress(ctx.primary, preset),
+        ])
+    return None
+
+
+def _combo_docx_to_pdf_page_numbers_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        *_pi_file_ops(ctx.primary, _PIPE_DOCX_PAGE_NUMBERS),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _combo_docx_to_pdf_flatten_compress(ctx: _ComboContext) -> ClarificationResult | None:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        *_pi_file_ops(ctx.primary, _PIPE_DOCX_FLATTEN),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+# Ordered (required bits, any-of bits, none-of bits, builder). Order matters:
+# the first builder that returns a result wins, same as the old if-chain.
+_COMBO_RULES = (
+    (_B_MERGE | _B_COMPRESS | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_compress),
+    (_B_MERGE | _B_WATERMARK | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_watermark),
+    (_B_OCR | _B_COMPRESS | _B_PDF, 0, 0, _combo_ocr_compress),
+    (_B_ENHANCE | _B_OCR | _B_PDF, 0, 0, _combo_enhance_ocr),
+    (_B_ENHANCE | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_enhance_compress),
+    (_B_ROTATE | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_rotate_compress),
+    (_B_FLATTEN | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_flatten_compress),
+    (_B_CLEAN | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_clean_compress),
+    (_B_WATERMARK | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_watermark_compress),
+    (_B_PAGE_NUMBERS | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_page_numbers_compress),
+    (_B_SPLIT | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_split_compress),
+    (_B_WATERMARK | _B_PAGE_NUMBERS | _B_PDF, 0, 0, _combo_pdf_watermark_page_numbers),
+    (_B_ROTATE | _B_SPLIT | _B_PDF, 0, 0, _combo_pdf_rotate_split),
+    (_B_MERGE | _B_OCR | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_ocr),
+    (_B_MERGE | _B_ENHANCE | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_enhance),
+    (_B_MERGE | _B_FLATTEN | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_flatten),
+    (_B_MERGE | _B_PAGE_NUMBERS | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_page_numbers),
+    (_B_MERGE | _B_ROTATE | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_rotate),
+    (_B_MERGE | _B_CLEAN | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_clean),
+    (_B_OCR | _B_FLATTEN | _B_PDF, 0, 0, _combo_ocr_flatten),
+    (_B_OCR | _B_PAGE_NUMBERS | _B_PDF, 0, 0, _combo_ocr_page_numbers),
+    (_B_OCR | _B_CLEAN | _B_PDF, 0, 0, _combo_pdf_ocr_clean),
+    (_B_OCR | _B_ROTATE | _B_PDF, 0, 0, _combo_pdf_ocr_rotate),
+    (_B_CLEAN | _B_REORDER | _B_PDF, 0, 0, _combo_pdf_clean_reorder),
+    (_B_CLEAN | _B_FLATTEN | _B_PDF, 0, 0, _combo_pdf_clean_flatten),
+    (_B_PAGE_NUMBERS | _B_FLATTEN | _B_PDF, 0, 0, _combo_pdf_page_numbers_flatten),
+    (_B_WATERMARK | _B_FLATTEN | _B_PDF, 0, 0, _combo_pdf_watermark_flatten),
+    (_B_ROTATE | _B_REORDER | _B_PDF, 0, 0, _combo_pdf_rotate_reorder),
+    (_B_ENHANCE | _B_OCR | _B_COMPRESS | _B_PDF, 0, 0, _combo_enhance_ocr_compress),
+    (_B_CLEAN | _B_OCR | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_clean_ocr_compress),
+    (_B_MERGE | _B_CLEAN | _B_COMPRESS | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_clean_compress),
+    (_B_MERGE | _B_ROTATE | _B_COMPRESS | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_rotate_compress),
+    (_B_MERGE | _B_OCR | _B_COMPRESS | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_ocr_compress),
+    (_B_OCR | _B_PAGE_NUMBERS | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_ocr_page_numbers_compress),
+    (_B_ROTATE | _B_PAGE_NUMBERS | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_rotate_page_numbers_compress),
+    (_B_MERGE | _B_WATERMARK | _B_COMPRESS | _B_ALL_PDFS | _B_MULTI, 0, 0, _combo_pdf_merge_watermark_compress),
+    (_B_ENHANCE | _B_FLATTEN | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_enhance_flatten_compress),
+    (_B_CLEAN | _B_FLATTEN | _B_COMPRESS | _B_PDF, 0, 0, _combo_pdf_clean_flatten_compress),
+    (_B_TO_DOCX, _B_IMAGE | _B_ALL_IMAGES, 0, _combo_image_to_docx),
+    (_B_COMPRESS | _B_ALL_IMAGES, _B_MERGE | _B_TO_PDF, 0, _combo_image_to_pdf_compress),
+    (_B_WATERMARK | _B_ALL_IMAGES, _B_MERGE | _B_TO_PDF, 0, _combo_image_to_pdf_watermark),
+    (_B_PAGE_NUMBERS | _B_ALL_IMAGES, _B_MERGE | _B_TO_PDF, 0, _combo_image_to_pdf_page_numbers),
+    (_B_ENHANCE | _B_OCR | _B_IMAGE, 0, 0, _combo_enhance_ocr),
+    (_B_ENHANCE | _B_TO_PDF | _B_IMAGE, 0, 0, _combo_image_enhance_to_pdf),
+    (_B_ENHANCE | _B_COMPRESS | _B_IMAGE, 0, 0, _combo_image_enhance_compress),
+    (_B_ROTATE | _B_ALL_IMAGES, _B_MERGE | _B_TO_PDF, 0, _combo_image_to_pdf_rotate),
+    (_B_OCR | _B_ALL_IMAGES, _B_MERGE | _B_TO_PDF, 0, _combo_image_to_pdf_ocr),
+    (_B_FLATTEN | _B_ALL_IMAGES, _B_MERGE | _B_TO_PDF, 0, _combo_image_to_pdf_flatten),
+    (_B_OCR | _B_COMPRESS | _B_IMAGE, 0, 0, _combo_ocr_compress),
+    (_B_OCR | _B_PAGE_NUMBERS | _B_IMAGE, 0, 0, _combo_ocr_page_numbers),
+    (_B_OCR | _B_FLATTEN | _B_IMAGE, 0, 0, _combo_ocr_flatten),
+    (_B_ENHANCE | _B_ROTATE | _B_IMAGE, 0, 0, _combo_image_enhance_rotate),
+    (_B_ENHANCE | _B_OCR | _B_COMPRESS | _B_IMAGE, 0, 0, _combo_enhance_ocr_compress),
+    (_B_OCR | _B_COMPRESS | _B_ALL_IMAGES, _B_MERGE | _B_TO_PDF, 0, _combo_image_to_pdf_ocr_compress),
+    (_B_ROTATE | _B_COMPRESS | _B_ALL_IMAGES, _B_MERGE | _B_TO_PDF, 0, _combo_image_to_pdf_rotate_compress),
+    (_B_ENHANCE | _B_OCR | _B_PAGE_NUMBERS | _B_IMAGE, 0, 0, _combo_image_enhance_ocr_page_numbers),
+    (_B_WATERMARK | _B_COMPRESS | _B_ALL_IMAGES, _B_MERGE | _B_TO_PDF, 0, _combo_image_to_pdf_watermark_compress),
+    (_B_OCR | _B_ROTATE | _B_COMPRESS | _B_IMAGE, 0, 0, _combo_image_ocr_rotate_compress),
+    (_B_DOCX | _B_TO_IMAGE, 0, _B_COMPRESS, _combo_docx_to_image),
+    (_B_DOCX | _B_TO_PDF | _B_COMPRESS, 0, 0, _combo_docx_to_pdf_compress),
+    (_B_DOCX | _B_TO_PDF | _B_WATERMARK, 0, 0, _combo_docx_to_pdf_watermark),
+    (_B_DOCX | _B_TO_PDF | _B_PAGE_NUMBERS, 0, 0, _combo_docx_to_pdf_page_numbers),
+    (_B_DOCX | _B_TO_IMAGE | _B_COMPRESS, 0, 0, _combo_docx_to_image_compress),
+    (_B_DOCX | _B_DELETE_PAGES, 0, 0, _combo_docx_delete_pages),
+    (_B_DOCX | _B_TO_PDF | _B_FLATTEN, 0, 0, _combo_docx_to_pdf_flatten),
+    (_B_DOCX | _B_CLEAN | _B_COMPRESS, 0, 0, _combo_docx_clean_compress),
+    (_B_DOCX | _B_ENHANCE | _B_COMPRESS, 0, 0, _combo_docx_enhance_compress),
+    (_B_DOCX | _B_TO_PDF | _B_OCR | _B_COMPRESS, 0, 0, _combo_docx_to_pdf_ocr_compress),
+    (_B_DOCX | _B_TO_PDF | _B_WATERMARK | _B_COMPRESS, 0, 0, _combo_docx_to_pdf_watermark_compress),
+    (_B_DOCX | _B_TO_PDF | _B_PAGE_NUMBERS | _B_COMPRESS, 0, 0, _combo_docx_to_pdf_page_numbers_compress),
+    (_B_DOCX | _B_TO_PDF | _B_FLATTEN | _B_COMPRESS, 0, 0, _combo_docx_to_pdf_flatten_compress),
+)
+
+
+@lru_cache(maxsize=1024)
+def _combo_candidates(mask: int) -> tuple:
+    """Builders whose bit conditions hold for this mask, in table order."""
+    return tuple(
+        builder
+        for required, any_of, none_of, builder in _COMBO_RULES
+        if mask & required == required
+        and (not any_of or mask & any_of)
+        and not mask & none_of
+    )
+
+
+def _wf_pdf_compress_screen(ctx: _ComboContext) -> ClarificationResult:
+    return _ok(_pi_compress(ctx.primary, "screen"))
+
+
+def _wf_docx_compress_screen(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_docx_to_pdf(ctx.primary),
+        _pi_compress(ctx.primary, "screen"),
+    ])
+
+
+def _wf_images_compress_screen(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_compress(ctx.primary, "screen"),
+    ])
+
+
+def _wf_pdf_flatten(ctx: _ComboContext) -> ClarificationResult:
+    return _ok(_pi_flatten_pdf(ctx.primary))
+
+
+def _wf_images_to_pdf(ctx: _ComboContext) -> ClarificationResult:
+    return _ok(_pi_images_to_pdf(ctx.file_names))
+
+
+def _wf_ocr(ctx: _ComboContext) -> ClarificationResult:
+    return _ok(_pi_ocr(ctx.primary))
+
+
+def _wf_pdf_optimize(ctx: _ComboContext) -> ClarificationResult:
+    preset = _infer_compress_preset(ctx.user_prompt)
+    return _ok([
+        _pi_remove_blank_pages(ctx.primary),
+        _pi_compress(ctx.primary, preset),
+    ])
+
+
+def _wf_pdf_final(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        *_pi_file_ops(ctx.primary, _PIPE_BLANK_FLATTEN),
+        _pi_compress(ctx.primary, "ebook"),
+    ])
+
+
+def _wf_docx_final(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        *_pi_file_ops(ctx.primary, _PIPE_DOCX_FLATTEN),
+        _pi_compress(ctx.primary, "ebook"),
+    ])
+
+
+def _wf_pdf_ocr_compress(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_ocr(ctx.primary),
+        _pi_compress(ctx.primary, "ebook"),
+    ])
+
+
+def _wf_images_ocr_compress(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_ocr(ctx.primary),
+        _pi_compress(ctx.primary, "ebook"),
+    ])
+
+
+def _wf_pdf_compress(ctx: _ComboContext) -> ClarificationResult:
+    return _ok(_pi_compress(ctx.primary, "ebook"))
+
+
+def _wf_docx_compress(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_docx_to_pdf(ctx.primary),
+        _pi_compress(ctx.primary, "ebook"),
+    ])
+
+
+def _wf_images_compress(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_compress(ctx.primary, "ebook"),
+    ])
+
+
+def _wf_pdf_archive(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_flatten_pdf(ctx.primary),
+        _pi_compress(ctx.primary, "ebook"),
+    ])
+
+
+def _wf_images_ocr_flatten(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        *_pi_file_ops(ctx.primary, _PIPE_OCR_FLATTEN),
+    ])
+
+
+def _wf_pdf_neat(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_remove_blank_pages(ctx.primary),
+        _pi_enhance_scan(ctx.primary),
+    ])
+
+
+def _wf_merge_clean(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_merge(ctx.file_names),
+        _pi_remove_blank_pages(ctx.primary),
+    ])
+
+
+def _wf_pdf_rotate(ctx: _ComboContext) -> ClarificationResult:
+    return _ok(_pi_rotate(ctx.primary, 90))
+
+
+def _wf_images_rotate(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_rotate(ctx.primary, 90),
+    ])
+
+
+def _wf_pdf_remove_blank(ctx: _ComboContext) -> ClarificationResult:
+    return _ok(_pi_remove_blank_pages(ctx.primary))
+
+
+# Ordered (_RE_KEYWORDS group, required bits, any-of bits, builder) for the named
+# workflows ("email ready", "for whatsapp", ...). The first row whose keyword was seen
+# and whose file bits hold wins, same precedence as the old if-chain.
+_WORKFLOW_RULES = (
+    ("email_ready", 0, _B_PDF, _wf_pdf_compress_screen),
+    ("email_ready", 0, _B_DOCX, _wf_docx_compress_screen),
+    ("email_ready", 0, _B_IMAGE, _wf_images_compress_screen),
+    ("fix_scan", 0, _B_PDF | _B_IMAGE, _combo_enhance_ocr),
+    ("print_ready", 0, _B_PDF, _wf_pdf_flatten),
+    ("print_ready", 0, _B_DOCX, _combo_docx_to_pdf_flatten),
+    ("print_ready", 0, _B_IMAGE, _wf_images_to_pdf),
+    ("searchable", 0, _B_PDF | _B_IMAGE, _wf_ocr),
+    ("secure", 0, _B_PDF, _wf_pdf_flatten),
+    ("optimize", 0, _B_PDF, _wf_pdf_optimize),
+    ("optimize", 0, _B_DOCX, _combo_docx_to_pdf_compress),
+    ("final", 0, _B_PDF, _wf_pdf_final),
+    ("final", 0, _B_DOCX, _wf_docx_final),
+    ("submission", 0, _B_PDF, _wf_pdf_ocr_compress),
+    ("submission", 0, _B_IMAGE, _wf_images_ocr_compress),
+    ("submission", 0, _B_DOCX, _wf_docx_compress),
+    ("archive", 0, _B_PDF, _wf_pdf_archive),
+    ("archive", 0, _B_DOCX, _wf_docx_final),
+    ("whatsapp", 0, _B_PDF, _wf_pdf_compress_screen),
+    ("whatsapp", 0, _B_DOCX, _wf_docx_compress_screen),
+    ("whatsapp", 0, _B_IMAGE, _wf_images_compress_screen),
+    ("govt", 0, _B_PDF, _combo_ocr_flatten),
+    ("govt", 0, _B_IMAGE, _wf_images_ocr_flatten),
+    ("scan_quality", 0, _B_PDF | _B_IMAGE, _combo_enhance_ocr),
+    ("neat", 0, _B_PDF, _wf_pdf_neat),
+    ("professional", 0, _B_PDF, _wf_pdf_final),
+    ("professional", 0, _B_DOCX, _wf_docx_final),
+    ("sendable", 0, _B_PDF, _wf_pdf_compress),
+    ("sendable", 0, _B_DOCX, _wf_docx_compress),
+    ("sendable", 0, _B_IMAGE, _wf_images_compress),
+    ("convert_shrink", 0, _B_DOCX, _wf_docx_compress),
+    ("convert_shrink", 0, _B_IMAGE, _wf_images_compress),
+    ("scan_to_pdf", 0, _B_IMAGE | _B_ALL_IMAGES, _wf_images_to_pdf),
+    ("combine_fix", _B_ALL_PDFS | _B_MULTI, 0, _wf_merge_clean),
+    ("combine_shrink", _B_ALL_PDFS | _B_MULTI, 0, _combo_pdf_merge_compress),
+    ("combine_shrink", _B_ALL_IMAGES, 0, _combo_image_to_pdf_compress),
+    ("fix_orientation", 0, _B_PDF, _wf_pdf_rotate),
+    ("fix_orientation", 0, _B_IMAGE, _wf_images_rotate),
+    ("remove_extra", 0, _B_PDF, _wf_pdf_remove_blank),
+    ("mobile", 0, _B_PDF, _wf_pdf_compress_screen),
+    ("mobile", 0, _B_DOCX, _wf_docx_compress_screen),
+)
+
+
+_REPLY_ALREADY_PDF = _ask(clarification="This file is already a PDF. Try 'compress', 'to docx', or 'to images' instead.")
+_REPLY_ALREADY_IMAGE_FILE = _ask(clarification="This file is already an image. Try 'compress', 'to pdf', or 'rotate' instead.")
+_REPLY_ALREADY_DOCX = _ask(clarification="This file is already a Word document. Try 'to pdf' to convert it.")
+
+
+def _type_pdf_already_pdf(ctx: _ComboContext) -> ClarificationResult | None:
+    if ctx.num_operations <= 1:
+        return _REPLY_ALREADY_PDF
+    return None
+
+
+def _type_image_already_image(ctx: _ComboContext) -> ClarificationResult:
+    return _REPLY_ALREADY_IMAGE_FILE
+
+
+def _type_docx_already_docx(ctx: _ComboContext) -> ClarificationResult:
+    return _REPLY_ALREADY_DOCX
+
+
+def _type_docx_to_pdf(ctx: _ComboContext) -> ClarificationResult:
+    return _ok(_pi_docx_to_pdf(ctx.primary))
+
+
+def _type_enhance(ctx: _ComboContext) -> ClarificationResult:
+    return _ok(_pi_enhance_scan(ctx.primary))
+
+
+def _type_docx_to_images(ctx: _ComboContext) -> ClarificationResult:
+    return _ok([
+        _pi_docx_to_pdf(ctx.primary),
+        _pi_pdf_to_images(ctx.primary, "png"),
+    ])
+
+
+def _type_docx_split(ctx: _ComboContext) -> ClarificationResult:
+    pages = _parse_page_ranges(ctx.user_prompt)
+    if pages:
+        return _ok([
+            _pi_docx_to_pdf(ctx.primary),
+            _pi_split(ctx.primary, pages),
+        ])
+    return _ask(
+        clarification="Which pages do you want after converting to PDF?",
+        options=["pages 1", "pages 1-3", "all pages as separate PDFs"]
+    )
+
+
+def _type_docx_watermark(ctx: _ComboContext) -> ClarificationResult:
+    text = ctx.wm_phrase
+    if text:
+        return _ok([
+            _pi_docx_to_pdf(ctx.primary),
+            _pi_watermark(ctx.primary, text),
+        ])
+    return _ask(
+        clarification="What watermark text? (Will convert DOCX to PDF first)",
+        options=["watermark CONFIDENTIAL", "watermark DRAFT"]
+    )
+
+
+def _type_docx_page_numbers(ctx: _ComboContext) -> ClarificationResult:
+    return _ok(_pi_file_ops(ctx.primary, _PIPE_DOCX_PAGE_NUMBERS))
+
+
+def _type_docx_reorder(ctx: _ComboContext) -> ClarificationResult:
+    m = _RE_REORDER_ORDER.search(ctx.prompt_compact)
+    if "reverse" in ctx.keyword_hits:
+        return _ok([
+            _pi_docx_to_pdf(ctx.primary),
+            _pi_reorder(ctx.primary, "reverse"),
+        ])
+    if m:
+        order = [int(x) for x in m.group(1).replace(",", " ").split()]
+        if order:
+            return _ok([
+                _pi_docx_to_pdf(ctx.primary),
+                _pi_reorder(ctx.primary, order),
+            ])
+    return _ask(
+        clarification="What page order after converting to PDF? (example: 2,1,3)",
+        options=["reverse all pages", "reorder to 2,1,3"]
+    )
+
+
+def _type_docx_clean(ctx: _ComboContext) -> ClarificationResult:
+    is_duplicate = "duplicate" in ctx.keyword_hits
+    op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
+    return _ok([
+        _pi_docx_to_pdf(ctx.primary),
+        _pi_file_op(op_type, ctx.primary),
+    ])
+
+
+def _type_image_watermark(ctx: _ComboContext) -> ClarificationResult:
+    text = ctx.wm_phrase
+    if text:
+        return _ok([
+            _pi_images_to_pdf(ctx.file_names),
+            _pi_watermark(ctx.primary, text),
+        ])
+    return _ask(
+        clarification="What watermark text? (Will convert image to PDF first)",
+        options=["watermark CONFIDENTIAL", "watermark DRAFT"]
+    )
+
+
+def _type_image_rotate(ctx: _ComboContext) -> ClarificationResult:
+    degrees = _rotation_degrees(ctx.prompt_compact, allow_270=True)
+    return _ok([
+        _pi_images_to_pdf(ctx.file_names),
+        _pi_rotate(ctx.primary, degrees),
+    ])
+
+
+def _type_images_reorder(ctx: _ComboContext) -> ClarificationResult:
+    if "reverse" in ctx.keyword_hits:
+        return _ok(_pi_images_to_pdf(list(reversed(ctx.file_names))))
+    return _ask(
+        clarification="What order should the images be combined into PDF? (example: 2,1,3)",
+        options=["combine as uploaded order", "reverse order"]
+    )
+
+
+# Single-operation requests resolved by file type, checked after the combos and before
+# the named workflows. Same (required, any-of, none-of, builder) layout as _COMBO_RULES.
+_TYPE_RULES = (
+    (_B_IMAGE | _B_TO_IMAGE, 0, _B_TO_PDF | _B_COMPRESS, _type_image_already_image),
+    (_B_PDF | _B_TO_PDF, 0, 0, _type_pdf_already_pdf),
+    (_B_DOCX | _B_TO_DOCX, 0, 0, _type_docx_already_docx),
+    (_B_MERGE | _B_ALL_IMAGES, 0, 0, _wf_images_to_pdf),
+    (_B_TO_PDF | _B_ALL_IMAGES, 0, 0, _wf_images_to_pdf),
+    (_B_TO_PDF | _B_DOCX, 0, 0, _type_docx_to_pdf),
+    (_B_OCR | _B_IMAGE, 0, 0, _wf_ocr),
+    (_B_EXTRACT_TEXT | _B_IMAGE, 0, 0, _wf_ocr),
+    (_B_ENHANCE | _B_IMAGE, 0, 0, _type_enhance),
+    (_B_TO_IMAGE | _B_DOCX, 0, 0, _type_docx_to_images),
+    (_B_SPLIT | _B_DOCX, 0, 0, _type_docx_split),
+    (_B_COMPRESS | _B_DOCX, 0, 0, _combo_docx_to_pdf_compress),
+    (_B_WATERMARK | _B_DOCX, 0, 0, _type_docx_watermark),
+    (_B_PAGE_NUMBERS | _B_DOCX, 0, 0, _type_docx_page_numbers),
+    (_B_REORDER | _B_DOCX, 0, 0, _type_docx_reorder),
+    (_B_FLATTEN | _B_DOCX, 0, 0, _combo_docx_to_pdf_flatten),
+    (_B_CLEAN | _B_DOCX, 0, 0, _type_docx_clean),
+    (_B_WATERMARK | _B_IMAGE, 0, 0, _type_image_watermark),
+    (_B_PAGE_NUMBERS | _B_IMAGE, 0, 0, _combo_image_to_pdf_page_numbers),
+    (_B_COMPRESS | _B_IMAGE, 0, 0, _combo_image_to_pdf_compress),
+    (_B_ROTATE | _B_IMAGE, 0, 0, _type_image_rotate),
+    (_B_FLATTEN | _B_IMAGE, 0, 0, _combo_image_to_pdf_flatten),
+    (_B_REORDER | _B_ALL_IMAGES | _B_MULTI, 0, 0, _type_images_reorder),
+)
+
+
+@lru_cache(maxsize=1024)
+def _type_candidates(mask: int) -> tuple:
+    """Builders from _TYPE_RULES whose bit conditions hold for this mask, in table order."""
+    return tuple(
+        builder
+        for required, any_of, none_of, builder in _TYPE_RULES
+        if mask & required == required
+        and (not any_of or mask & any_of)
+        and not mask & none_of
+    )
+
+
+# Last-resort replies for operations the uploaded file type cannot take, as
+# (required bits, none-of bits, shared reply); checked after the named workflows.
+_TYPE_REPLIES = (
+    (_B_SPLIT | _B_IMAGE, 0, _ask(clarification="Images don't have pages to split. Upload a multi-page PDF instead.")),
+    (_B_OCR | _B_DOCX, 0, _ask(clarification="DOCX is already text-based — no OCR needed!")),
+    (_B_REORDER | _B_IMAGE, _B_MULTI, _ask(clarification="Upload multiple images to reorder and combine into PDF")),
+    (_B_CLEAN | _B_IMAGE, 0, _ask(clarification="Upload a multi-page PDF to remove blank/duplicate pages")),
+    (_B_MERGE | _B_MULTI, _B_ALL_PDFS | _B_ALL_IMAGES, _ask(clarification="Upload either all PDFs or all images to merge")),
+    (_B_EXTRACT_TEXT | _B_DOCX, 0, _ask(clarification="DOCX is already a text document — just open it!")),
+    (_B_ENHANCE | _B_DOCX, 0, _ask(clarification="Enhance is for scanned documents. DOCX is already clear text.")),
+    (_B_MERGE | _B_PDF, _B_MULTI, _ask(clarification="Upload at least 2 PDFs to merge")),
+    (_B_MERGE | _B_IMAGE, _B_MULTI, _ask(clarification="Upload more images to combine, or just say 'to pdf'")),
+    (_B_MERGE | _B_DOCX, _B_MULTI, _ask(clarification="Upload multiple files to merge")),
+)
+
+
+# Stand-in file names used by _typed_heuristics; _copy_clarification_result swaps the
+# real upload names back in by index.
+_FILE_SLOT = "\x00file:"
+
+
+@lru_cache(maxsize=4096)
+def _typed_heuristics(user_prompt: str, prompt_for_match: str, prompt_compact: str, kinds: tuple[int, ...]) -> ClarificationResult | None:
+    """
+    Deterministic keyword/file-type heuristics (combos, type guards, workflows).
+
+    Only the file kinds (_file_kind per upload) influence the outcome, so results are
+    cached on them rather than on the names and shared across uploads. Intents refer to
+    files through _FILE_SLOT placeholders; callers must go through
+    _copy_clarification_result to get a private copy with the real names.
+    """
+    file_names = [f"{_FILE_SLOT}{i}" for i in range(len(kinds))]
+    primary = file_names[0]
+    file_kind = kinds[0]
+    num_files = len(kinds)
+    all_kind = _ALL_KIND_BITS.get(file_kind, 0) if kinds.count(file_kind) == num_files else 0
+    
+    caps = _scan_capabilities(prompt_compact)
+    wm_text, wm_phrase = _extract_watermark_text(user_prompt) if caps & _B_WATERMARK else ("", "")
+    keyword_hits = _scan_keywords(prompt_compact)
+    
+    num_operations = (caps & _B_OPERATIONS).bit_count()
+    
+    combo_mask = (
+        caps
+        | file_kind
+        | all_kind
+        | _B_MULTI * (num_files >= 2)
+    )
+    combo_ctx = _ComboContext(
+        primary=primary,
+        file_names=file_names,
+        user_prompt=user_prompt,
+        prompt_compact=prompt_compact,
+        prompt_for_match=prompt_for_match,
+        wm_text=wm_text,
+        wm_phrase=wm_phrase,
+        keyword_hits=keyword_hits,
+        num_operations=num_operations,
+    )
+    for builder in _combo_candidates(combo_mask):
+        result = builder(combo_ctx)
+        if result is not None:
+            return result
+
+    for builder in _type_candidates(combo_mask):
+        result = builder(combo_ctx)
+        if result is not None:
+            return result
+    
+    if keyword_hits:
+        for keyword, required, any_of, builder in _WORKFLOW_RULES:
+            if (
+                keyword in keyword_hits
+                and combo_mask & required == required
+                and (not any_of or combo_mask & any_of)
+            ):
+                return builder(combo_ctx)
+
+    for required, none_of, reply in _TYPE_REPLIES:
+        if combo_mask & required == required and not combo_mask & none_of:
+            return reply
+
+    return None
+
+
+def _bind_file_slots(intent: ParsedIntent, file_names: list[str]) -> ParsedIntent:
+    """Replace _FILE_SLOT placeholders in a copied intent with the uploaded file names."""
+    op = intent.get_operation()
+    file = getattr(op, "file", None)
+    if file is not None and file.startswith(_FILE_SLOT):
+        op.file = file_names[int(file[len(_FILE_SLOT):])]
+    files = getattr(op, "files", None)
+    if files is not None:
+        op.files = [file_names[int(f[len(_FILE_SLOT):])] if f.startswith(_FILE_SLOT) else f for f in files]
+    return intent
+
+
+def _copy_clarification_result(result: ClarificationResult, file_names: list[str]) -> ClarificationResult:
+    """Copy a cached result so callers can mutate intents (e.g. filename resolution) safely.
+
+    Option-less replies carry only strings and are returned as-is.
+    """
+    intent = result.intent
+    if intent is None and result.options is None:
+        return result
+    if isinstance(intent, list):
+        intent = [_bind_file_slots(i.model_copy(deep=True), file_names) for i in intent]
+    elif intent is not None:
+        intent = _bind_file_slots(intent.model_copy(deep=True), file_names)
+    return ClarificationResult(
+        intent=intent,
+        clarification=result.clarification,
+        options=list(result.options) if result.options is not None else None,
+    )
+
+def _reply_for_parse_error(error: ValueError, user_prompt: str, prompt_compact: str) -> ClarificationResult | None:
+    """Reply for an ai_parser failure: the model's question or the unsupported reply.
+
+    Returns None when the caller should continue with its own fallbacks.
+    """
+    if isinstance(error, ClarificationNeeded):
+        clarification = error.clarification
+        options = error.options
+
+        # An order question has already had its context options derived here; the
+        # common-questions lookup would only derive them again.
+        if _is_order_clarification(clarification):
+            fallback = _order_options_from_context(user_prompt, clarification)
+            if fallback:
+                options = fallback
+        elif not options:
+            options = _options_for_common_questions(clarification, user_prompt)
+        print(f"[AI] Requesting clarification: {clarification}")
+        return _ask(clarification=clarification, options=options)
+
+    if _is_likely_unsupported_validation_error(str(error)) or _is_explicitly_unsupported_request(prompt_compact):
+        return _REPLY_UNSUPPORTED
+    return None
+
+
+def _is_vague_command(p: str) -> bool:
+    """Detect vague/meaningless commands that need clarification (p is prompt_compact)."""
+    if not p:
+        return True
+    if len(p) < 3:
+        return True
+    if _RE_VAGUE_COMMAND.match(p):
+        return True
+    has_recognizable = any(word in p for word in _RECOGNIZABLE_WORDS)
+    if not has_recognizable and len(p.split()) <= 3:
+        return True
+    return False
+
+
+def _resolve_multi_step(user_prompt: str, file_names: list[str], prompt_compact: str) -> ClarificationResult:
+    """Multi-step prompts go to the LLM first, then the local pipeline parsers."""
+    try:
+        intent = ai_parser.parse_intent(user_prompt, file_names)
+        return _ok(intent)
+    except ValueError as e:
+        reply = _reply_for_parse_error(e, user_prompt, prompt_compact)
+        if reply is not None:
+            return reply
+
+        fallback_multi = _fallback_parse_multi_step_pipeline(user_prompt, file_names)
+        if fallback_multi:
+            return _ok(fallback_multi)
+
+        fallback_pipeline = _fallback_parse_two_step_pipeline(user_prompt, file_names)
+        if fallback_pipeline:
+            return _ok(fallback_pipeline)
+
+        return _REPLY_MULTI_STEP_HELP
+
+
+def clarify_intent(user_prompt: str, file_names: list[str], last_question: str = "", allow_multi: bool = True) -> ClarificationResult:
+    """
+    Try to parse the user's intent. Handle common patterns like 'compress to X MB', 'split 1st page', etc.
+    If still ambiguous after pattern detection, provide helpful clarification.
+    
+    INTEGRATION POINTS:
+    1. _fix_common_connector_typos: Uses ErrorClassifier for typo/shorthand correction
+    2. _try_3stage_resolution: Optional 3-stage resolution for ambiguous commands
+    3. Error guards: File-type compatibility checks
+    4. _try_one_flow_resolution: 40K+ pattern One-Flow Resolution (NEW - NON-BREAKING)
+    5. TERMINAL_INTENTS_NO_PARAMS: Guard to skip parameter collection for terminal intents
+    """
+    
+    one_flow_result = _try_one_flow_resolution(user_prompt, file_names)
+    if one_flow_result is not None:
+        return one_flow_result
+    
+    user_prompt = _fix_common_connector_typos(user_prompt)
+    prompt_for_match = _normalize_prompt_for_heuristics(user_prompt)
+    prompt_compact = prompt_for_match.strip().lower()
+    primary = file_names[0] if file_names else None
+    primary_lower = (primary or "").lower()
+    kinds = tuple(_file_kind(f) for f in file_names)
+    primary_kind = kinds[0] if kinds else 0
+    last_question_lower = (last_question or "").lower()
+
+    if _is_explicitly_unsupported_request(prompt_compact):
+        return _REPLY_UNSUPPORTED
+
+    if file_names and _is_vague_command(prompt_compact):
+        if primary_kind == _B_PDF:
+            if len(file_names) >= 2:
+                options = ["merge all files", "compress files", "split first page"]
             else:
-                return ClarificationResult(
-                    clarification="What watermark text? (Will convert DOCX to PDF first)",
-                    options=["watermark CONFIDENTIAL", "watermark DRAFT"]
-                )
-        
-        if wants_page_numbers and is_docx_file:
-            return ClarificationResult(
-                intent=[
-                    ParsedIntent(
-                        operation_type="docx_to_pdf",
-                        docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                    ),
-                    ParsedIntent(
-                        operation_type="page_numbers",
-                        page_numbers={"operation": "page_numbers", "file": primary},
-                    ),
-                ]
-            )
-        
-        if wants_reorder and is_docx_file:
-            m = re.search(r"\b(?:to|as)\b\s*([0-9,\s]+)", user_prompt, re.IGNORECASE)
-            is_reverse = bool(re.search(r"\breverse\b", prompt_compact))
-            if is_reverse:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="reorder",
-                            reorder={"operation": "reorder", "file": primary, "new_order": "reverse"},
-                        ),
-                    ]
-                )
-            elif m:
-                order = [int(x) for x in re.findall(r"\d+", m.group(1))]
-                if order:
-                    return ClarificationResult(
-                        intent=[
-                            ParsedIntent(
-                                operation_type="docx_to_pdf",
-                                docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                            ),
-                            ParsedIntent(
-                                operation_type="reorder",
-                                reorder={"operation": "reorder", "file": primary, "new_order": order},
-                            ),
-                        ]
-                    )
-            return ClarificationResult(
-                clarification="What page order after converting to PDF? (example: 2,1,3)",
-                options=["reverse all pages", "reorder to 2,1,3"]
-            )
-        
-        if wants_flatten and is_docx_file:
-            return ClarificationResult(
-                intent=[
-                    ParsedIntent(
-                        operation_type="docx_to_pdf",
-                        docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                    ),
-                    ParsedIntent(
-                        operation_type="flatten_pdf",
-                        flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                    ),
-                ]
-            )
-        
-        if wants_clean and is_docx_file:
-            is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
-            op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
-            return ClarificationResult(
-                intent=[
-                    ParsedIntent(
-                        operation_type="docx_to_pdf",
-                        docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                    ),
-                    ParsedIntent(
-                        operation_type=op_type,
-                        **{op_type: {"operation": op_type, "file": primary}},
-                    ),
-                ]
+                options = ["compress", "split first page", "convert to docx", "rotate 90 degrees"]
+            return _ask(
+                clarification="What would you like to do with your PDF? Here are some options:",
+                options=options
             )
-        
-        if wants_watermark and is_image_file:
-            m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(.+)$", user_prompt, re.IGNORECASE)
-            text = (m.group(1).strip() if m else "").strip("\"'")
-            if text:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="watermark",
-                            watermark={"operation": "watermark", "file": primary, "text": text},
-                        ),
-                    ]
-                )
+        elif primary_lower.endswith(('.png', '.jpg', '.jpeg')):
+            if len(file_names) >= 2:
+                options = ["combine into PDF", "convert to docx", "enhance images"]
             else:
-                return ClarificationResult(
-                    clarification="What watermark text? (Will convert image to PDF first)",
-                    options=["watermark CONFIDENTIAL", "watermark DRAFT"]
-                )
-        
-        if wants_page_numbers and is_image_file:
-            return ClarificationResult(
-                intent=[
-                    ParsedIntent(
-                        operation_type="images_to_pdf",
-                        images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                    ),
-                    ParsedIntent(
-                        operation_type="page_numbers",
-                        page_numbers={"operation": "page_numbers", "file": primary},
-                    ),
-                ]
-            )
-        
-        if wants_compress and is_image_file:
-            preset = _infer_compress_preset(user_prompt)
-            return ClarificationResult(
-                intent=[
-                    ParsedIntent(
-                        operation_type="images_to_pdf",
-                        images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                    ),
-                    ParsedIntent(
-                        operation_type="compress",
-                        compress={"operation": "compress", "file": primary, "preset": preset},
-                    ),
-                ]
-            )
-        
-        if wants_rotate and is_image_file:
-            degrees = 90  # default
-            if re.search(r"\b(left|counter|anti)\b", prompt_compact):
-                degrees = 270
-            elif re.search(r"\b180\b", prompt_compact):
-                degrees = 180
-            elif re.search(r"\b270\b", prompt_compact):
-                degrees = 270
-            return ClarificationResult(
-                intent=[
-                    ParsedIntent(
-                        operation_type="images_to_pdf",
-                        images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                    ),
-                    ParsedIntent(
-                        operation_type="rotate",
-                        rotate={"operation": "rotate", "file": primary, "degrees": degrees, "pages": None},
-                    ),
-                ]
-            )
-        
-        if wants_flatten and is_image_file:
-            return ClarificationResult(
-                intent=[
-                    ParsedIntent(
-                        operation_type="images_to_pdf",
-                        images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                    ),
-                    ParsedIntent(
-                        operation_type="flatten_pdf",
-                        flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                    ),
-                ]
-            )
-        
-        if wants_reorder and all_images and num_files > 1:
-            is_reverse = bool(re.search(r"\breverse\b", prompt_compact))
-            if is_reverse:
-                reversed_files = list(reversed(file_names))
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="images_to_pdf",
-                        images_to_pdf={"operation": "images_to_pdf", "files": reversed_files},
-                    )
-                )
-            return ClarificationResult(
-                clarification="What order should the images be combined into PDF? (example: 2,1,3)",
-                options=["combine as uploaded order", "reverse order"]
+                options = ["convert to PDF", "convert to docx", "enhance", "OCR to searchable PDF"]
+            return _ask(
+                clarification="What would you like to do with your image? Here are some options:",
+                options=options
             )
-        
-        
-        wants_email_ready = bool(re.search(r"\b(email\s*ready|for\s*email|send\s*(by\s*)?email|email\s*size)\b", prompt_compact))
-        if wants_email_ready:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="compress",
-                        compress={"operation": "compress", "file": primary, "preset": "strong"},
-                    )
-                )
-            elif is_docx_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "strong"},
-                        ),
-                    ]
-                )
-            elif is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "strong"},
-                        ),
-                    ]
-                )
-        
-        wants_fix_scan = bool(re.search(r"\b(fix\s*(this\s*)?scan|fix\s*scanned|clean\s*scan)\b", prompt_compact))
-        if wants_fix_scan:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                    ]
-                )
-            elif is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                    ]
-                )
-        
-        wants_print_ready = bool(re.search(r"\b(print\s*ready|for\s*print|printing)\b", prompt_compact))
-        if wants_print_ready:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="flatten_pdf",
-                        flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                    )
-                )
-            elif is_docx_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                    ]
-                )
-            elif is_image_file:
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="images_to_pdf",
-                        images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                    )
-                )
-        
-        wants_searchable = bool(re.search(r"\b(make\s*searchable|searchable\s*pdf|text\s*searchable)\b", prompt_compact))
-        if wants_searchable:
-            if is_pdf_file or is_image_file:
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="ocr",
-                        ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                    )
-                )
-        
-        wants_secure = bool(re.search(r"\b(secure|protect|sanitize)\s*pdf\b", prompt_compact))
-        if wants_secure and is_pdf_file:
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="flatten_pdf",
-                    flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                )
+        elif primary_kind == _B_DOCX:
+            options = ["convert to PDF", "convert to images"]
+            return _ask(
+                clarification="What would you like to do with your DOCX? Here are some options:",
+                options=options
             )
-        
-        wants_optimize = bool(re.search(r"\b(optimize\s*(file|pdf)?|optimise)\b", prompt_compact))
-        if wants_optimize:
-            if is_pdf_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="remove_blank_pages",
-                            remove_blank_pages={"operation": "remove_blank_pages", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            elif is_docx_file:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-        
-        wants_final = bool(re.search(r"\b(final\s*(version|pdf|copy)?|finalize)\b", prompt_compact))
-        if wants_final:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="remove_blank_pages",
-                            remove_blank_pages={"operation": "remove_blank_pages", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-            elif is_docx_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-        
-        wants_submission = bool(re.search(r"\b(submission\s*ready|college\s*submission|submit|assignment)\b", prompt_compact))
-        if wants_submission:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-            elif is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-            elif is_docx_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-        
-        wants_archive = bool(re.search(r"\b(archive\s*ready|for\s*archive|archiving)\b", prompt_compact))
-        if wants_archive:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-            elif is_docx_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-        
-        wants_whatsapp = bool(re.search(r"\b(whatsapp|wa)\s*(size|ready)?\b", prompt_compact))
-        if wants_whatsapp:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="compress",
-                        compress={"operation": "compress", "file": primary, "preset": "strong"},
-                    )
-                )
-            elif is_docx_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "strong"},
-                        ),
-                    ]
-                )
-            elif is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "strong"},
-                        ),
-                    ]
-                )
-        
-        wants_govt = bool(re.search(r"\b(govt|government)\s*(submission)?\b", prompt_compact))
-        if wants_govt:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                    ]
-                )
-            elif is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                    ]
-                )
-        
-        wants_scan_quality = bool(re.search(r"\b(scan\s*quality|quality\s*fix|improve\s*scan)\b", prompt_compact))
-        if wants_scan_quality:
-            if is_pdf_file or is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="ocr",
-                            ocr={"operation": "ocr", "file": primary, "language": "eng", "deskew": True},
-                        ),
-                    ]
-                )
-        
-        wants_neat = bool(re.search(r"\b(make\s*it\s*neat|neat\s*up|tidy)\b", prompt_compact))
-        if wants_neat:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="remove_blank_pages",
-                            remove_blank_pages={"operation": "remove_blank_pages", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="enhance_scan",
-                            enhance_scan={"operation": "enhance_scan", "file": primary},
-                        ),
-                    ]
-                )
-        
-        wants_professional = bool(re.search(r"\b(make\s*professional|professional\s*(copy|version)?|look\s*professional)\b", prompt_compact))
-        if wants_professional:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="remove_blank_pages",
-                            remove_blank_pages={"operation": "remove_blank_pages", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-            elif is_docx_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="flatten_pdf",
-                            flatten_pdf={"operation": "flatten_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-        
-        wants_sendable = bool(re.search(r"\b(sendable|shareable|share\s*ready)\b", prompt_compact))
-        if wants_sendable:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="compress",
-                        compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                    )
-                )
-            elif is_docx_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-            elif is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-        
-        wants_convert_shrink = bool(re.search(r"\b(convert\s*(and|&)\s*(shrink|compress|smaller))\b", prompt_compact))
-        if wants_convert_shrink:
-            if is_docx_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-            elif is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "balanced"},
-                        ),
-                    ]
-                )
-        
-        wants_scan_to_pdf = bool(re.search(r"\bscan\s*to\s*pdf\b", prompt_compact))
-        if wants_scan_to_pdf:
-            if is_image_file or all_images:
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="images_to_pdf",
-                        images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                    )
-                )
-        
-        wants_combine_fix = bool(re.search(r"\b(combine\s*(and|&)\s*fix|merge\s*(and|&)\s*clean)\b", prompt_compact))
-        if wants_combine_fix and all_pdfs and num_files >= 2:
-            return ClarificationResult(
-                intent=[
-                    ParsedIntent(
-                        operation_type="merge",
-                        merge={"operation": "merge", "files": file_names},
-                    ),
-                    ParsedIntent(
-                        operation_type="remove_blank_pages",
-                        remove_blank_pages={"operation": "remove_blank_pages", "file": primary},
-                    ),
-                ]
+        else:
+            return _ask(
+                clarification="What would you like to do? Please describe the operation (e.g., 'compress', 'merge', 'convert to pdf').",
+                options=["compress", "merge", "convert to pdf"]
             )
-        
-        wants_combine_shrink = bool(re.search(r"\b(combine\s*(and|&)\s*(shrink|compress)|merge\s*(and|&)\s*(shrink|compress))\b", prompt_compact))
-        if wants_combine_shrink:
-            if all_pdfs and num_files >= 2:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="merge",
-                            merge={"operation": "merge", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-            elif all_images:
-                preset = _infer_compress_preset(user_prompt)
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": preset},
-                        ),
-                    ]
-                )
-        
-        wants_fix_orientation = bool(re.search(r"\b(fix\s*(orientation|rotation)|orientation\s*fix)\b", prompt_compact))
-        if wants_fix_orientation:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="rotate",
-                        rotate={"operation": "rotate", "file": primary, "degrees": 90, "pages": None},
-                    )
-                )
-            elif is_image_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="images_to_pdf",
-                            images_to_pdf={"operation": "images_to_pdf", "files": file_names},
-                        ),
-                        ParsedIntent(
-                            operation_type="rotate",
-                            rotate={"operation": "rotate", "file": primary, "degrees": 90, "pages": None},
-                        ),
-                    ]
-                )
-        
-        wants_remove_extra = bool(re.search(r"\b(remove\s*extra|extra\s*pages?|unwanted\s*pages?)\b", prompt_compact))
-        if wants_remove_extra:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="remove_blank_pages",
-                        remove_blank_pages={"operation": "remove_blank_pages", "file": primary},
-                    )
-                )
-        
-        wants_mobile = bool(re.search(r"\b(mobile\s*(optimized?|ready)?|for\s*mobile|phone\s*size)\b", prompt_compact))
-        if wants_mobile:
-            if is_pdf_file:
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="compress",
-                        compress={"operation": "compress", "file": primary, "preset": "strong"},
-                    )
-                )
-            elif is_docx_file:
-                return ClarificationResult(
-                    intent=[
-                        ParsedIntent(
-                            operation_type="docx_to_pdf",
-                            docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                        ),
-                        ParsedIntent(
-                            operation_type="compress",
-                            compress={"operation": "compress", "file": primary, "preset": "strong"},
-                        ),
-                    ]
-                )
-        
-        
-        if wants_split and is_image_file:
-            return ClarificationResult(clarification="Images don't have pages to split. Upload a multi-page PDF instead.")
-        
-        if wants_ocr and is_docx_file:
-            return ClarificationResult(clarification="DOCX is already text-based — no OCR needed!")
-        
-        if wants_reorder and is_image_file and num_files == 1:
-            return ClarificationResult(clarification="Upload multiple images to reorder and combine into PDF")
-        
-        if wants_clean and is_image_file:
-            return ClarificationResult(clarification="Upload a multi-page PDF to remove blank/duplicate pages")
-        
-        if wants_merge and not all_pdfs and not all_images and num_files > 1:
-            return ClarificationResult(clarification="Upload either all PDFs or all images to merge")
-        
-        if wants_extract_text and is_docx_file:
-            return ClarificationResult(clarification="DOCX is already a text document — just open it!")
-        
-        if wants_enhance and is_docx_file:
-            return ClarificationResult(clarification="Enhance is for scanned documents. DOCX is already clear text.")
-        
-        if wants_merge and num_files == 1:
-            if is_pdf_file:
-                return ClarificationResult(clarification="Upload at least 2 PDFs to merge")
-            if is_image_file:
-                return ClarificationResult(clarification="Upload more images to combine, or just say 'to pdf'")
-            if is_docx_file:
-                return ClarificationResult(clarification="Upload multiple files to merge")
-
 
     if file_names:
-        primary = file_names[0]
-        primary_lower = (primary or "").lower()
-        wants_convert = bool(re.search(r"\b(convert|change)\b", prompt_for_match, re.IGNORECASE))
-        wants_word = bool(re.search(r"\b(word|docx|doc)\b", prompt_for_match, re.IGNORECASE))
-        wants_pdf = bool(re.search(r"\bpdf\b", prompt_for_match, re.IGNORECASE))
-        wants_images = bool(re.search(r"\b(images?|img|png|jpe?g)\b", prompt_for_match, re.IGNORECASE))
-
-        if wants_convert and wants_pdf and primary_lower.endswith(".docx"):
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="docx_to_pdf",
-                    docx_to_pdf={"operation": "docx_to_pdf", "file": primary},
-                )
-            )
+        typed_result = _typed_heuristics(user_prompt, prompt_for_match, prompt_compact, kinds)
+        if typed_result is _DEFER_TO_MULTI_STEP:
+            if allow_multi:
+                return _resolve_multi_step(user_prompt, file_names, prompt_compact)
+        elif typed_result is not None:
+            return _copy_clarification_result(typed_result, file_names)
 
-        if wants_convert and wants_word and primary_lower.endswith(".pdf"):
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="pdf_to_docx",
-                    pdf_to_docx={"operation": "pdf_to_docx", "file": primary},
-                )
-            )
 
-        if wants_convert and wants_images and primary_lower.endswith(".pdf"):
+    # Only DOCX and PDF uploads have a convert shortcut; each target regex runs only
+    # for the file kind that can use it.
+    if primary_kind in (_B_DOCX, _B_PDF) and _RE_CONVERT_VERB.search(prompt_compact):
+        if primary_kind == _B_DOCX:
+            if "pdf" in prompt_compact and _RE_PDF_TARGET.search(prompt_compact):
+                return _ok(_pi_docx_to_pdf(primary))
+
+        elif _RE_WORD_TARGET.search(prompt_compact):
+            return _ok(_pi_pdf_to_docx(primary))
+
+        elif _RE_IMAGES_TARGET.search(prompt_compact):
             fmt = "png"
-            if re.search(r"\bjpe?g\b|\bjpg\b", prompt_for_match, re.IGNORECASE):
+            if "jp" in prompt_compact and _RE_JPG.search(prompt_compact):
                 fmt = "jpg"
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="pdf_to_images",
-                    pdf_to_images={
-                        "operation": "pdf_to_images",
-                        "file": primary,
-                        "format": fmt,
-                        "dpi": 150,
-                    },
-                )
-            )
+            return _ok(_pi_pdf_to_images(primary, fmt))
 
     if (
         file_names
-        and re.fullmatch(r"-?\d+", prompt_compact)
-        and "degree" in (last_question or "").lower()
-        and "rotate" in (last_question or "").lower()
+        and _is_int_literal(prompt_compact)
+        and "degree" in last_question_lower
+        and "rotate" in last_question_lower
     ):
         prompt_for_match = f"rotate {prompt_compact} degrees"
         prompt_compact = prompt_for_match
 
     if allow_multi:
-        try:
-            auto_ordered = _auto_order_multi_op_no_order(user_prompt, file_names)
-            if auto_ordered:
-                user_prompt = auto_ordered
-                prompt_for_match = _normalize_prompt_for_heuristics(user_prompt)
-                prompt_compact = prompt_for_match.strip().lower()
-        except ValueError as e:
-            msg = str(e)
-            if "CLARIFICATION_NEEDED:" in msg:
-                parts = msg.split(" | OPTIONS: ")
-                clarification = parts[0].replace("CLARIFICATION_NEEDED: ", "")
-                options = None
-                if len(parts) > 1:
-                    try:
-                        options = json.loads(parts[1])
-                    except:
-                        options = None
-                return ClarificationResult(clarification=clarification, options=options)
+        auto_ordered = _auto_order_multi_op_no_order(user_prompt, file_names)
+        if isinstance(auto_ordered, ClarificationResult):
+            return auto_ordered
+        if auto_ordered:
+            user_prompt = auto_ordered
+            prompt_for_match = _normalize_prompt_for_heuristics(user_prompt)
+            prompt_compact = prompt_for_match.strip().lower()
 
         if not _has_explicit_order_words(user_prompt):
             order_result = _maybe_order_ambiguity_options(user_prompt, file_names)
             if order_result is not None:
                 return order_result
 
-    if file_names and prompt_compact in {"png", "jpg", "jpeg", "img", "to img", "to image", "to images"}:
-        file_name = file_names[0]
-        file_lower = file_name.lower()
-        
-        if file_lower.endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp')):
-            return ClarificationResult(clarification="Already an image")
-        
-        output_format = "png"
-        if prompt_compact in {"jpg", "jpeg"}:
-            output_format = "jpg"
-        elif prompt_compact == "png":
-            output_format = "png"
-        
-        return ClarificationResult(
-            intent=ParsedIntent(
-                operation_type="pdf_to_images",
-                pdf_to_images={
-                    "operation": "pdf_to_images",
-                    "file": file_name,
-                    "format": output_format,
-                    "dpi": 150,
-                },
-            )
-        )
+    output_format = _IMAGE_FORMAT_SHORTCUTS.get(prompt_compact) if file_names else None
+    if output_format:
+        if primary_kind == _B_IMAGE:
+            return _REPLY_ALREADY_IMAGE
+        return _ok(_pi_pdf_to_images(primary, output_format))
 
     if file_names and prompt_compact in {"docx", "word"}:
         file_name = file_names[0]
-        return ClarificationResult(
-            intent=ParsedIntent(
-                operation_type="pdf_to_docx",
-                pdf_to_docx={"operation": "pdf_to_docx", "file": file_name},
-            )
-        )
+        return _ok(_pi_pdf_to_docx(file_name))
 
     if file_names and prompt_compact == "txt":
         file_name = file_names[0]
-        return ClarificationResult(
-            intent=ParsedIntent(
-                operation_type="extract_text",
-                extract_text={"operation": "extract_text", "file": file_name, "pages": None},
-            )
-        )
+        return _ok(_pi_extract_text(file_name))
 
     if file_names and prompt_compact == "ocr":
         file_name = file_names[0]
-        return ClarificationResult(
-            intent=ParsedIntent(
-                operation_type="ocr",
-                ocr={"operation": "ocr", "file": file_name, "language": "eng", "deskew": True},
-            )
-        )
+        return _ok(_pi_ocr(file_name))
 
-    if file_names and re.search(r"\b(ocr|make searchable)\b", prompt_compact, re.IGNORECASE) and not re.search(r"\b(split|delete|extract page|keep page)\b", prompt_compact, re.IGNORECASE):
+    shortcuts = _scan_shortcuts(prompt_compact) if file_names else set()
+    page_selection = "page_selection" in shortcuts
+
+    if "ocr" in shortcuts and not page_selection:
         file_name = file_names[0]
-        return ClarificationResult(
-            intent=ParsedIntent(
-                operation_type="ocr",
-                ocr={"operation": "ocr", "file": file_name, "language": "eng", "deskew": True},
-            )
-        )
+        return _ok(_pi_ocr(file_name))
 
-    if file_names and re.search(r"\b(extract text|extract_text|get text)\b", prompt_compact, re.IGNORECASE) and not re.search(r"\b(split|delete|extract page|keep page)\b", prompt_compact, re.IGNORECASE):
+    if "extract_text" in shortcuts and not page_selection:
         file_name = file_names[0]
-        return ClarificationResult(
-            intent=ParsedIntent(
-                operation_type="extract_text",
-                extract_text={"operation": "extract_text", "file": file_name, "pages": None},
-            )
-        )
+        return _ok(_pi_extract_text(file_name))
 
-    if file_names and re.search(r"\b(flatten|flat)\b", prompt_compact, re.IGNORECASE) and not re.search(r"\b(split|delete|extract page|keep page)\b", prompt_compact, re.IGNORECASE):
+    if "flatten" in shortcuts and not page_selection:
         file_name = file_names[0]
-        return ClarificationResult(
-            intent=ParsedIntent(
-                operation_type="flatten",
-                flatten={"operation": "flatten", "file": file_name},
-            )
-        )
+        return _ok(_pi_flatten_pdf(file_name))
 
-    if file_names and re.search(r"\b(enhance|clean|fix scan|enhance scan)\b", prompt_compact, re.IGNORECASE) and not re.search(r"\b(split|delete|extract page|keep page)\b", prompt_compact, re.IGNORECASE):
+    if "enhance" in shortcuts and not page_selection:
         file_name = file_names[0]
-        return ClarificationResult(
-            intent=ParsedIntent(
-                operation_type="enhance_scan",
-                enhance_scan={"operation": "enhance_scan", "file": file_name},
-            )
-        )
+        return _ok(_pi_enhance_scan(file_name))
 
-    if (not allow_multi) or (not _looks_like_multi_operation_prompt(user_prompt)):
-        if len(file_names) >= 2 and re.search(r"\b(merge|combine|join)\b", prompt_for_match, re.IGNORECASE):
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="merge",
-                    merge={"operation": "merge", "files": file_names},
-                )
-            )
+    # Every branch below keys on a shortcut, so prompts without one (including every
+    # prompt without an upload) skip the multi-op check here.
+    if shortcuts and ((not allow_multi) or (not _looks_like_multi_operation_prompt(user_prompt))):
+        if len(file_names) >= 2 and "merge" in shortcuts:
+            return _ok(_pi_merge(file_names))
 
-        if file_names and re.search(r"\b(delete|remove)\b", prompt_for_match, re.IGNORECASE) and not _is_terminal_intent(user_prompt):
+        if "delete" in shortcuts and not _is_terminal_intent(user_prompt):
             pages = _parse_page_ranges(user_prompt)
             if not pages:
-                return ClarificationResult(
+                return _ask(
                     clarification="Which pages should I delete? (example: 2,4-6)",
                     options=_options_for_pages_question("delete"),
                 )
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="delete",
-                    delete={"operation": "delete", "file": file_names[0], "pages_to_delete": pages},
-                )
-            )
+            return _ok(_pi_delete(file_names[0], pages))
 
-        if file_names and re.search(r"\breorder\b|\bswap\b|\breverse\b", prompt_for_match, re.IGNORECASE):
-            is_reverse = bool(re.search(r"\breverse\b", prompt_for_match, re.IGNORECASE))
-            m = re.search(r"\b(?:to|as)\b\s*([0-9,\s]+)", user_prompt, re.IGNORECASE)
+        if "reorder" in shortcuts:
+            is_reverse = "reverse" in shortcuts
+            m = _RE_REORDER_ORDER.search(prompt_compact)
             
             if is_reverse and not m:
-                return ClarificationResult(
-                    intent=ParsedIntent(
-                        operation_type="reorder",
-                        reorder={"operation": "reorder", "file": file_names[0], "new_order": "reverse"},
-                    )
-                )
+                return _ok(_pi_reorder(file_names[0], "reverse"))
             
             if not m:
-                return ClarificationResult(
+                return _ask(
                     clarification="What is the new page order? (example: 2,1,3)",
                     options=["reorder pages to 2,1,3", "reverse all pages"],
                 )
-            order = [int(x) for x in re.findall(r"\d+", m.group(1))]
+            order = [int(x) for x in m.group(1).replace(",", " ").split()]
             if not order:
-                return ClarificationResult(
+                return _ask(
                     clarification="What is the new page order? (example: 2,1,3)",
                     options=["reorder pages to 2,1,3", "reverse all pages"],
                 )
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="reorder",
-                    reorder={"operation": "reorder", "file": file_names[0], "new_order": order},
-                )
-            )
+            return _ok(_pi_reorder(file_names[0], order))
 
-        if file_names and re.search(r"\bwatermark\b", prompt_for_match, re.IGNORECASE):
-            m = re.search(r"\bwatermark\b(?:\s+(?:with|text|as))?\s+(.+)$", user_prompt, re.IGNORECASE)
-            text = (m.group(1).strip() if m else "").strip("\"'")
+        if "watermark" in shortcuts:
+            _, text = _extract_watermark_text(user_prompt)
             if not text:
-                return ClarificationResult(
+                return _ask(
                     clarification="What watermark text should I add?",
                     options=["watermark CONFIDENTIAL", "watermark DRAFT"],
                 )
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="watermark",
-                    watermark={"operation": "watermark", "file": file_names[0], "text": text},
-                )
-            )
+            return _ok(_pi_watermark(file_names[0], text))
 
-        if file_names and re.search(r"\bpage\s*numbers?\b|\bnumber\s*pages\b", prompt_for_match, re.IGNORECASE):
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="page_numbers",
-                    page_numbers={"operation": "page_numbers", "file": file_names[0]},
-                )
-            )
+        if "page_numbers" in shortcuts:
+            return _ok(_pi_page_numbers(file_names[0]))
 
-        if file_names and re.search(r"\bsplit\s*to\s*files\b|\bseparate\s+pdfs\b|\beach\s+page\b", prompt_for_match, re.IGNORECASE):
+        if "split_to_files" in shortcuts:
             pages = _parse_page_ranges(user_prompt)
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="split_to_files",
-                    split_to_files={"operation": "split_to_files", "file": file_names[0], "pages": (pages or None)},
-                )
-            )
+            return _ok(_pi_split_to_files(file_names[0], pages or None))
 
     if allow_multi and _looks_like_multi_operation_prompt(user_prompt):
-        try:
-            intent = ai_parser.parse_intent(user_prompt, file_names)
-            return ClarificationResult(intent=intent)
-        except ValueError as e:
-            error_msg = str(e)
-            if "CLARIFICATION_NEEDED:" in error_msg:
-                parts = error_msg.split(" | OPTIONS: ")
-                clarification = parts[0].replace("CLARIFICATION_NEEDED: ", "")
-                options = None
-                if len(parts) > 1:
-                    try:
-                        options = json.loads(parts[1])
-                    except:
-                        pass
-
-                if _is_order_clarification(clarification):
-                    fallback = _order_options_from_context(user_prompt, clarification)
-                    if fallback:
-                        options = fallback
-
-                if not options:
-                    options = _options_for_common_questions(clarification, user_prompt)
-                print(f"[AI] Requesting clarification: {clarification}")
-                return ClarificationResult(clarification=clarification, options=options)
-
-            if _is_likely_unsupported_validation_error(error_msg) or _is_explicitly_unsupported_request(prompt_for_match):
-                return ClarificationResult(clarification=UNSUPPORTED_REPLY)
-
-            fallback_multi = _fallback_parse_multi_step_pipeline(user_prompt, file_names)
-            if fallback_multi:
-                return ClarificationResult(intent=fallback_multi)
-
-            fallback_pipeline = _fallback_parse_two_step_pipeline(user_prompt, file_names)
-            if fallback_pipeline:
-                return ClarificationResult(intent=fallback_pipeline)
-
-            return ClarificationResult(
-                clarification=(
-                    "Sorry, I couldn't fully understand the multi-step request. "
-                    "Try adding an explicit order like: 'split pages 1-2 and then compress to 2MB'."
-                )
-            )
+        return _resolve_multi_step(user_prompt, file_names, prompt_compact)
 
-    mb_match = re.search(r"compress( this| pdf)?( to| under)?\s*(\d+)\s*mb", prompt_for_match, re.IGNORECASE)
-    if mb_match and file_names:
-        target_mb = int(mb_match.group(3))
+    has_compress = "compress" in prompt_compact
+    compress_target = (
+        _scan_first_matches(_RE_COMPRESS_TARGET, prompt_compact, ("mb", "percent"))
+        if file_names and has_compress and ("mb" in prompt_compact or "%" in prompt_compact)
+        else {}
+    )
+    mb_match = compress_target.get("mb")
+    if mb_match:
+        target_mb = int(mb_match.group("mb_value"))
         file_name = file_names[0]
-        compress_intent = ParsedIntent(
-            operation_type="compress_to_target",
-            compress_to_target={"operation": "compress_to_target", "file": file_name, "target_mb": target_mb},
-        )
-        return ClarificationResult(intent=compress_intent)
+        compress_intent = _pi_compress_to_target(file_name, target_mb)
+        return _ok(compress_intent)
     
-    percent_match = re.search(r"compress( this)?( pdf)? by (\d{1,3})%", prompt_for_match, re.IGNORECASE)
-    if percent_match and file_names:
-        percent = int(percent_match.group(3))
+    percent_match = compress_target.get("percent")
+    if percent_match:
+        percent = int(percent_match.group("percent_value"))
         file_name = file_names[0]
-        file_path = get_upload_path(file_name)
-        if os.path.exists(file_path):
-            size_bytes = os.path.getsize(file_path)
+        try:
+            size_bytes = os.path.getsize(get_upload_path(file_name))
+        except OSError:
+            pass
+        else:
             size_mb = size_bytes / (1024 * 1024)
             target_mb = max(1, int(size_mb * (percent / 100)))
-            compress_intent = ParsedIntent(
-                operation_type="compress_to_target",
-                compress_to_target={"operation": "compress_to_target", "file": file_name, "target_mb": target_mb},
-            )
-            return ClarificationResult(intent=compress_intent)
+            compress_intent = _pi_compress_to_target(file_name, target_mb)
+            return _ok(compress_intent)
     
-    if file_names and re.search(r"\bsplit\s+(all\s+)?pages?\b", prompt_for_match, re.IGNORECASE):
-        if not re.search(r"\b(pages?\s+)?\d+(-\d+)?(\s*,\s*\d+(-\d+)?)*\b", prompt_for_match):
-            return ClarificationResult(
-                intent=ParsedIntent(
-                    operation_type="split_to_files",
-                    split_to_files={"operation": "split_to_files", "file": file_names[0], "pages": None},
-                )
-            )
-
-    first_page_match = re.search(r"(split|extract|keep)\s*(1st|first|page 1)\s*page", prompt_for_match, re.IGNORECASE)
-    if first_page_match and file_names:
+    if file_names and "split" in prompt_compact and _RE_SPLIT_ALL_PAGES.search(prompt_compact):
+        if not _RE_PAGE_LIST.search(prompt_compact):
+            return _ok(_pi_split_to_files(file_names[0]))
+
+    first_pages = (
+        _scan_first_matches(_RE_FIRST_PAGES, prompt_compact, ("first_page", "first_n"))
+        if file_names and "page" in prompt_compact
+        else {}
+    )
+    if "first_page" in first_pages:
         file_name = file_names[0]
-        split_intent = ParsedIntent(
-            operation_type="split",
-            split={"operation": "split", "file": file_name, "pages": [1]},
-        )
-        return ClarificationResult(intent=split_intent)
+        split_intent = _pi_split(file_name, [1])
+        return _ok(split_intent)
     
-    first_n_match = re.search(r"(split|extract|keep)\s*first\s*(\d+)\s*pages?", prompt_for_match, re.IGNORECASE)
-    if first_n_match and file_names:
-        n = int(first_n_match.group(2))
+    first_n_match = first_pages.get("first_n")
+    if first_n_match:
+        n = int(first_n_match.group("first_n_value"))
         file_name = file_names[0]
-        split_intent = ParsedIntent(
-            operation_type="split",
-            split={"operation": "split", "file": file_name, "pages": list(range(1, n + 1))},
-        )
-        return ClarificationResult(intent=split_intent)
-
-    rotate_word = re.search(r"\b(rotate|rotat|turn|flip|straight)\b", prompt_for_match, re.IGNORECASE)
-    rotate_number = re.search(r"(-?\d+)\s*(deg|degree|degrees)?\b", prompt_for_match, re.IGNORECASE)
-    rotate_dir_left = re.search(r"\b(left|anti|anticlock|counter)\b", prompt_for_match, re.IGNORECASE)
-    rotate_dir_right = re.search(r"\b(right|clockwise)\b", prompt_for_match, re.IGNORECASE)
+        split_intent = _pi_split(file_name, list(range(1, n + 1)))
+        return _ok(split_intent)
 
-    if file_names and (rotate_word or re.fullmatch(r"-?\d+", prompt_compact)):
+    if file_names and ("rotate" in shortcuts or _is_int_literal(prompt_compact)):
         file_name = file_names[0]
         degrees: int
 
-        if rotate_dir_left:
+        if "rotate_left" in shortcuts:
             degrees = 270
-        elif rotate_dir_right:
+        elif "rotate_right" in shortcuts:
             degrees = 90
-        elif re.search(r"\bflip\b", prompt_for_match, re.IGNORECASE):
+        elif "flip" in shortcuts:
             degrees = 180
-        elif rotate_number:
-            raw = int(rotate_number.group(1))
-            normalized = raw % 360
-            if normalized == 0:
-                degrees = 90
-            elif normalized == 90:
-                degrees = 90
-            elif normalized == 180:
-                degrees = 180
-            elif normalized == 270:
-                degrees = 270
-            else:
-                candidates = [90, 180, 270]
-                degrees = min(candidates, key=lambda d: min((normalized - d) % 360, (d - normalized) % 360))
         else:
-            degrees = 90
+            rotate_number = _RE_ROTATE_NUMBER.search(prompt_compact)
+            degrees = _ROTATION_BY_ANGLE[int(rotate_number.group(1)) % 360] if rotate_number else 90
 
-        rotate_intent = ParsedIntent(
-            operation_type="rotate",
-            rotate={"operation": "rotate", "file": file_name, "degrees": degrees, "pages": None},
-        )
-        return ClarificationResult(intent=rotate_intent)
+        rotate_intent = _pi_rotate(file_name, degrees)
+        return _ok(rotate_intent)
 
-    if re.search(r"\bcompress\b", prompt_for_match, re.IGNORECASE) and file_names:
+    if has_compress and file_names and _RE_COMPRESS_WORD.search(prompt_compact):
         preset = _infer_compress_preset(user_prompt)
         file_name = file_names[0]
-        compress_intent = ParsedIntent(
-            operation_type="compress",
-            compress={"operation": "compress", "file": file_name, "preset": preset},
-        )
-        return ClarificationResult(intent=compress_intent)
+        compress_intent = _pi_compress(file_name, preset)
+        return _ok(compress_intent)
     
     use_llm, reason = should_use_llm(user_prompt)
     
@@ -3664,54 +3035,17 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
         from app.prompt_sanitizer import get_file_type_from_names
         file_type = get_file_type_from_names(file_names)
         invalid_response = get_invalid_prompt_response(file_type)
-        return ClarificationResult(
+        return _ask(
             clarification=invalid_response.get("message", "I couldn't understand that. Please try again."),
             options=invalid_response.get("options", [])
         )
     
     try:
         intent = ai_parser.parse_intent(user_prompt, file_names)
-        return ClarificationResult(intent=intent)
+        return _ok(intent)
     except ValueError as e:
-        error_msg = str(e)
+        reply = _reply_for_parse_error(e, user_prompt, prompt_compact)
+        if reply is not None:
+            return reply
         
-        if "CLARIFICATION_NEEDED:" in error_msg:
-            parts = error_msg.split(" | OPTIONS: ")
-            clarification = parts[0].replace("CLARIFICATION_NEEDED: ", "")
-            options = None
-            if len(parts) > 1:
-                try:
-                    options = json.loads(parts[1])
-                except:
-                    pass
-
-            if _is_order_clarification(clarification):
-                fallback = _order_options_from_context(user_prompt, clarification)
-                if fallback:
-                    options = fallback
-
-            if not options:
-                options = _options_for_common_questions(clarification, user_prompt)
-            print(f"[AI] Requesting clarification: {clarification}")
-            return ClarificationResult(clarification=clarification, options=options)
-
-        if _is_likely_unsupported_validation_error(error_msg) or _is_explicitly_unsupported_request(prompt_for_match):
-            return ClarificationResult(clarification=UNSUPPORTED_REPLY)
-        
-        clarification = (
-            "Sorry, I couldn't understand your request. Here are some examples:\n\n"
-            "📄 Merge: 'merge these files', 'combine all PDFs'\n"
-            "✂️ Split: 'split 1st page', 'extract first 3 pages', 'keep pages 1-5'\n"
-            "🗑️ Delete: 'delete page 2', 'remove pages 3, 4, 5'\n"
-            "🗜️ Compress: 'compress to 1mb', 'compress to 5MB', 'compress by 50%'\n"
-            "📝 Convert: 'convert to docx', 'pdf to word'\n"
-            "🔄 Rotate: 'rotate page 1 by 90 degrees'\n"
-            "🔀 Reorder: 'reorder pages to 2,1,3'\n"
-            "🏷️ Watermark: 'watermark with CONFIDENTIAL'\n"
-            "#️⃣ Page numbers: 'add page numbers'\n"
-            "📄 Text: 'extract text'\n"
-            "🖼️ Images: 'export pages as png'\n"
-            "🔎 OCR: 'ocr this scan'\n\n"
-            "Please try again with a clearer instruction!"
-        )
-        return ClarificationResult(clarification=clarification)
+        return _REPLY_HELP
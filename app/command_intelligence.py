@@ -11,6 +11,7 @@ This module implements:
 from typing import Optional, Tuple, List, Dict, Any
 from enum import Enum
 from dataclasses import dataclass
+from functools import lru_cache
 import re
 import logging
 
@@ -51,6 +52,27 @@ class CommandParsing:
             self.issues = []
 
 
+_RE_PLAIN_WORDS = re.compile(r"[a-z ]+")
+
+# extract_parameters patterns, matched against the lowercased prompt.
+_RE_PAGE_RANGE = re.compile(r"pages?\s+(?:(\d+)\s*-\s*(\d+)|(\d+(?:\s*,\s*\d+)*))")
+_RE_COMMA = re.compile(r"\s*,\s*")
+_RE_TARGET_MB = re.compile(r"to\s+(\d+)\s*mb")
+
+# detect_ambiguity clarity signals, matched against the lowercased prompt.
+_RE_PAGE_NUMBER_GIVEN = re.compile(r"pages?\s+\d")
+_RE_TARGET_FORMAT_GIVEN = re.compile(r"to\s+(pdf|docx|jpg|png)")
+_RE_SIZE_HINT = re.compile(r"(small|tiny|reduce|half|email|whatsapp)")
+_RE_VAGUE_HINT = re.compile(r"(fix|optimize|make nice|whatever|something)")
+
+
+def _compile_union(patterns: List[str], flags: int = re.IGNORECASE) -> Optional[re.Pattern]:
+    """Compile patterns into one alternation, case-insensitive by default (None when empty)."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in patterns), flags)
+
+
 class CommandPatterns:
     """Pre-compiled regex patterns for command parsing"""
     
@@ -124,15 +146,38 @@ class CommandPatterns:
         r"deduplicate",
     ]
     
-    COMPILED_PATTERNS: Dict[str, List[re.Pattern]] = {
-        "merge": [re.compile(p, re.IGNORECASE) for p in MERGE_PATTERNS],
-        "split": [re.compile(p, re.IGNORECASE) for p in SPLIT_PATTERNS],
-        "delete": [re.compile(p, re.IGNORECASE) for p in DELETE_PATTERNS],
-        "compress": [re.compile(p, re.IGNORECASE) for p in COMPRESS_PATTERNS],
-        "ocr": [re.compile(p, re.IGNORECASE) for p in OCR_PATTERNS],
-        "convert": [re.compile(p, re.IGNORECASE) for p in CONVERT_PATTERNS],
-        "rotate": [re.compile(p, re.IGNORECASE) for p in ROTATE_PATTERNS],
-        "clean": [re.compile(p, re.IGNORECASE) for p in CLEAN_PATTERNS],
+    PATTERNS: Dict[str, List[str]] = {
+        "merge": MERGE_PATTERNS,
+        "split": SPLIT_PATTERNS,
+        "delete": DELETE_PATTERNS,
+        "compress": COMPRESS_PATTERNS,
+        "ocr": OCR_PATTERNS,
+        "convert": CONVERT_PATTERNS,
+        "rotate": ROTATE_PATTERNS,
+        "clean": CLEAN_PATTERNS,
+    }
+
+    # One case-insensitive alternation per intent: any pattern matching is one search.
+    COMPILED_PATTERNS: Dict[str, re.Pattern] = {
+        intent: _compile_union(patterns) for intent, patterns in PATTERNS.items()
+    }
+
+    # The same patterns split for a cheap probe: plain lowercase words are tested as
+    # substrings of the lowered prompt, only the rest need the regex engine. Used for
+    # ASCII prompts, where that is exactly what the case-insensitive search matches.
+    LITERAL_PATTERNS: Dict[str, Tuple[str, ...]] = {
+        intent: tuple(p for p in patterns if _RE_PLAIN_WORDS.fullmatch(p))
+        for intent, patterns in PATTERNS.items()
+    }
+    # A regex that starts with one of its intent's literal words (combine.*pdfs? after
+    # "combine") can only match where the literal probe already succeeded; drop it.
+    # These run on the lowered ASCII prompt, so they are compiled case-sensitive.
+    REGEX_PATTERNS: Dict[str, Optional[re.Pattern]] = {
+        intent: _compile_union([
+            p for p in patterns
+            if not _RE_PLAIN_WORDS.fullmatch(p) and not p.startswith(literals)
+        ], 0)
+        for (intent, patterns), literals in zip(PATTERNS.items(), LITERAL_PATTERNS.values())
     }
 
 
@@ -140,25 +185,44 @@ class CommandIntelligence:
     """Command intelligence system with confidence scoring"""
     
     @staticmethod
+    @lru_cache(maxsize=1024)
     def detect_intent(prompt: str) -> Optional[str]:
         """
         Detect primary intent from prompt.
         
         Returns operation name if detected, None otherwise.
+        Memoized: parse_command and calculate_confidence both ask for the same prompt.
         """
-        for intent, patterns in CommandPatterns.COMPILED_PATTERNS.items():
-            for pattern in patterns:
-                if pattern.search(prompt):
-                    logger.debug(f"[INTENT DETECTED] {intent}")
-                    return intent
+        ascii_lower = prompt.lower() if prompt.isascii() else None
+        for intent in CommandPatterns.COMPILED_PATTERNS:
+            if CommandIntelligence._matches_intent(prompt, ascii_lower, intent):
+                logger.debug(f"[INTENT DETECTED] {intent}")
+                return intent
         
         return None
+
+    @staticmethod
+    def _matches_intent(prompt: str, ascii_lower: Optional[str], intent: str) -> bool:
+        """Whether any of the intent's patterns matches the prompt.
+
+        ascii_lower is prompt.lower() for ASCII prompts (None otherwise); it lets the
+        literal words be probed as substrings and the remaining patterns run without
+        case folding.
+        """
+        if ascii_lower is not None:
+            for word in CommandPatterns.LITERAL_PATTERNS[intent]:
+                if word in ascii_lower:
+                    return True
+            pattern = CommandPatterns.REGEX_PATTERNS[intent]
+            return pattern is not None and pattern.search(ascii_lower) is not None
+        return CommandPatterns.COMPILED_PATTERNS[intent].search(prompt) is not None
     
     @staticmethod
     def calculate_confidence(
         prompt: str,
         intent: str,
         parameters: Dict[str, Any],
+        ambiguity: Optional[AmbiguityLevel] = None,
     ) -> float:
         """
         Calculate confidence score (0.0 to 1.0) for parsed intent.
@@ -167,6 +231,8 @@ class CommandIntelligence:
         - Clear intent keywords (+0.3)
         - Complete parameters (+0.4)
         - Low ambiguity (+0.3)
+
+        Pass ambiguity when the caller already has detect_ambiguity(prompt, intent).
         """
         confidence = 0.0
         
@@ -192,7 +258,8 @@ class CommandIntelligence:
             else:
                 confidence += 0.4  # No required params
         
-        ambiguity = CommandIntelligence.detect_ambiguity(prompt, intent)
+        if ambiguity is None:
+            ambiguity = CommandIntelligence.detect_ambiguity(prompt, intent)
         if ambiguity == AmbiguityLevel.LOW:
             confidence += 0.3
         elif ambiguity == AmbiguityLevel.MEDIUM:
@@ -215,6 +282,7 @@ class CommandIntelligence:
             return ConfidenceLevel.VERY_HIGH
     
     @staticmethod
+    @lru_cache(maxsize=1024)
     def detect_ambiguity(prompt: str, intent: str) -> AmbiguityLevel:
         """
         Detect ambiguity level in prompt.
@@ -223,24 +291,26 @@ class CommandIntelligence:
         - LOW: Clear parameters, explicit mention of what to do
         - MEDIUM: Missing some parameters but can infer
         - HIGH: Vague, multiple interpretations possible
+
+        Memoized on (prompt, intent); the score only depends on the prompt text.
         """
         prompt_lower = prompt.lower()
         
         clarity_score = 0
         
-        if re.search(r"pages?\s+\d", prompt_lower):
+        if _RE_PAGE_NUMBER_GIVEN.search(prompt_lower):
             clarity_score += 2
         
-        if re.search(r"to\s+(pdf|docx|jpg|png)", prompt_lower):
+        if _RE_TARGET_FORMAT_GIVEN.search(prompt_lower):
             clarity_score += 2
         
-        if re.search(r"(small|tiny|reduce|half|email|whatsapp)", prompt_lower):
+        if _RE_SIZE_HINT.search(prompt_lower):
             clarity_score += 1
         
-        if len(CommandIntelligence.find_all_intents(prompt)) > 1:
+        if CommandIntelligence._has_multiple_intents(prompt, prompt_lower):
             clarity_score -= 1
         
-        if re.search(r"(fix|optimize|make nice|whatever|something)", prompt_lower):
+        if _RE_VAGUE_HINT.search(prompt_lower):
             clarity_score -= 2
         
         if clarity_score >= 2:
@@ -251,46 +321,52 @@ class CommandIntelligence:
             return AmbiguityLevel.HIGH
     
     @staticmethod
-    def find_all_intents(prompt: str) -> List[str]:
-        """Find all potential intents in prompt"""
-        intents = []
-        
-        for intent, patterns in CommandPatterns.COMPILED_PATTERNS.items():
-            for pattern in patterns:
-                if pattern.search(prompt):
-                    intents.append(intent)
-                    break
-        
-        return intents
+    def _has_multiple_intents(prompt: str, prompt_lower: str) -> bool:
+        """len(find_all_intents(prompt)) > 1, stopping at the second matching intent."""
+        ascii_lower = prompt_lower if prompt.isascii() else None
+        found = False
+        for intent in CommandPatterns.COMPILED_PATTERNS:
+            if CommandIntelligence._matches_intent(prompt, ascii_lower, intent):
+                if found:
+                    return True
+                found = True
+        return False
+
+    @staticmethod
+    def find_all_intents(prompt: str, prompt_lower: Optional[str] = None) -> List[str]:
+        """Find all potential intents in prompt (prompt_lower: prompt.lower(), if at hand)"""
+        if not prompt.isascii():
+            ascii_lower = None
+        else:
+            ascii_lower = prompt_lower if prompt_lower is not None else prompt.lower()
+        return [
+            intent
+            for intent in CommandPatterns.COMPILED_PATTERNS
+            if CommandIntelligence._matches_intent(prompt, ascii_lower, intent)
+        ]
     
     @staticmethod
-    def extract_parameters(prompt: str, intent: str) -> Dict[str, Any]:
+    def extract_parameters(prompt: str, intent: str, prompt_lower: Optional[str] = None) -> Dict[str, Any]:
         """
         Extract parameters for the given intent.
         
-        Returns dictionary of parameter name → value.
+        Returns dictionary of parameter name → value. Pass prompt_lower when the
+        caller has already lowercased the prompt.
         """
         parameters = {}
-        prompt_lower = prompt.lower()
+        if prompt_lower is None:
+            prompt_lower = prompt.lower()
         
-        if intent == "split":
-            match = re.search(r"pages?\s+(?:(\d+)\s*-\s*(\d+)|(\d+(?:\s*,\s*\d+)*))", prompt_lower)
+        if intent == "split" or intent == "delete":
+            match = _RE_PAGE_RANGE.search(prompt_lower)
             if match:
                 if match.group(1) and match.group(2):  # Range
                     parameters["pages"] = list(range(int(match.group(1)), int(match.group(2)) + 1))
                 elif match.group(3):  # Comma-separated
-                    parameters["pages"] = [int(n.strip()) for n in match.group(3).split(",")]
-        
-        elif intent == "delete":
-            match = re.search(r"pages?\s+(?:(\d+)\s*-\s*(\d+)|(\d+(?:\s*,\s*\d+)*))", prompt_lower)
-            if match:
-                if match.group(1) and match.group(2):
-                    parameters["pages"] = list(range(int(match.group(1)), int(match.group(2)) + 1))
-                elif match.group(3):
-                    parameters["pages"] = [int(n.strip()) for n in match.group(3).split(",")]
+                    parameters["pages"] = list(map(int, _RE_COMMA.split(match.group(3))))
         
         elif intent == "compress":
-            match = re.search(r"to\s+(\d+)\s*mb", prompt_lower)
+            match = _RE_TARGET_MB.search(prompt_lower)
             if match:
                 parameters["target_mb"] = int(match.group(1))
             
@@ -339,10 +415,9 @@ class CommandIntelligence:
         
         parameters = CommandIntelligence.extract_parameters(prompt, intent)
         
-        confidence = CommandIntelligence.calculate_confidence(prompt, intent, parameters)
-        confidence_level = CommandIntelligence.get_confidence_level(confidence)
-        
         ambiguity = CommandIntelligence.detect_ambiguity(prompt, intent)
+        confidence = CommandIntelligence.calculate_confidence(prompt, intent, parameters, ambiguity)
+        confidence_level = CommandIntelligence.get_confidence_level(confidence)
         
         issues = []
         if ambiguity == AmbiguityLevel.HIGH:
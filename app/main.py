@@ -19,6 +19,7 @@ from typing import List, Optional
 from dataclasses import dataclass, field
 from threading import Lock
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -434,7 +435,7 @@ def _build_prompt_from_reply(base_instruction: str, question: str, user_reply: s
 
     if kind == "compress_size":
         r = reply.lower().replace(" ", "")
-        if re.fullmatch(r"\d+", r):
+        if r.isdecimal():
             r = f"{r}mb"
         if re.fullmatch(r"\d+(mb|kb)", r):
             return normalize_whitespace(f"{base} compress to {r}") if base else f"compress to {r}"
@@ -1947,7 +1948,7 @@ async def process_pdfs(
                 )
         else:
             if locked_mode:
-                clarification_result = clarify_intent(active_prompt, file_names, last_question="")
+                clarification_result = await run_in_threadpool(clarify_intent, active_prompt, file_names, last_question="")
 
                 if clarification_result.intent:
                     intent = clarification_result.intent
@@ -2013,14 +2014,14 @@ async def process_pdfs(
                                 active_prompt,
                             )
 
-                clarification_result = clarify_intent(prompt_to_parse, file_names, last_question=effective_question)
+                clarification_result = await run_in_threadpool(clarify_intent, prompt_to_parse, file_names, last_question=effective_question)
                 
                 if not clarification_result.intent and clarification_result.clarification and session:
                     from app.clarification_layer import _rephrase_with_context
                     rephrased = _rephrase_with_context(prompt_to_parse, session.last_success_intent, file_names)
                     if rephrased:
                         print(f"[AI] Rephrased '{prompt_to_parse}' → '{rephrased}'")
-                        clarification_result = clarify_intent(rephrased, file_names, last_question=effective_question)
+                        clarification_result = await run_in_threadpool(clarify_intent, rephrased, file_names, last_question=effective_question)
                 
                 if clarification_result.intent:
                     intent = clarification_result.intent
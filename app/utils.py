@@ -4,6 +4,7 @@ Shared utility functions to reduce code duplication across modules.
 
 import re
 from difflib import SequenceMatcher
+from functools import lru_cache
 
 
 RE_EXPLICIT_ORDER = re.compile(r"\b(and then|then|after that|afterwards|before that|before|first|second|finally)\b", re.IGNORECASE)
@@ -23,15 +24,72 @@ RE_PAGE_NUMBERS_OPS = re.compile(r"\bpage\s*numbers?\b", re.IGNORECASE)
 RE_OCR_OPS = re.compile(r"\bocr\b", re.IGNORECASE)
 RE_IMAGES_OPS = re.compile(r"\bimages?\b|\bimg\b|\bpng\b|\bjpg\b|\bjpeg\b", re.IGNORECASE)
 
+# Every *_OPS pattern above as one named group, so a prompt is scanned once.
+# Rotate, reorder, watermark, page numbers, OCR and images share the "other" bit.
+OP_FAMILY_BITS = {
+    "merge": 1 << 0,
+    "split": 1 << 1,
+    "delete": 1 << 2,
+    "compress": 1 << 3,
+    "convert": 1 << 4,
+    "rotate": 1 << 5,
+    "reorder": 1 << 5,
+    "watermark": 1 << 5,
+    "page_numbers": 1 << 5,
+    "ocr": 1 << 5,
+    "images": 1 << 5,
+}
+RE_ALL_OPS = re.compile(
+    "|".join(
+        f"(?P<{name}>{rx.pattern})"
+        for name, rx in (
+            ("merge", RE_MERGE_OPS),
+            ("split", RE_SPLIT_OPS),
+            ("delete", RE_DELETE_OPS),
+            ("compress", RE_COMPRESS_OPS),
+            ("convert", RE_CONVERT_OPS),
+            ("rotate", RE_ROTATE_OPS),
+            ("reorder", RE_REORDER_OPS),
+            ("watermark", RE_WATERMARK_OPS),
+            ("page_numbers", RE_PAGE_NUMBERS_OPS),
+            ("ocr", RE_OCR_OPS),
+            ("images", RE_IMAGES_OPS),
+        )
+    ),
+    re.IGNORECASE,
+)
+
 RE_PAGE_WITH_DIGIT = re.compile(r"\bpages?\b\s*\d", re.IGNORECASE)
 RE_DIGIT_RANGE = re.compile(r"\b\d+\s*-\s*\d+\b")
 RE_DIGIT_COMMA = re.compile(r"\b\d+\s*,\s*\d+\b")
+# Any of the three page-selection signals above, found with a single search.
+RE_PAGE_SIGNAL = re.compile(
+    "|".join(rx.pattern for rx in (RE_PAGE_WITH_DIGIT, RE_DIGIT_RANGE, RE_DIGIT_COMMA)),
+    re.IGNORECASE,
+)
 
 RE_ROTATE_DEGREES = re.compile(r"(-?\d+)\s*(deg|degree|degrees)?", re.IGNORECASE)
 RE_COMPRESS_SIZE = re.compile(r"(\d+)\s*(mb|kb)", re.IGNORECASE)
 RE_PAGE_RANGES = re.compile(r"\d+(\s*-\s*\d+)?(\s*,\s*\d+(\s*-\s*\d+)?)*")
 
 
+def scan_op_families(prompt: str, stop_at: int = 0) -> int:
+    """Bitmask of OP_FAMILY_BITS named in the prompt, from one RE_ALL_OPS pass.
+
+    The scan restarts one character after each match start so overlapping words
+    are still seen. With stop_at, it returns as soon as that many bits are set.
+    """
+    mask = 0
+    search = RE_ALL_OPS.search
+    m = search(prompt)
+    while m is not None:
+        mask |= OP_FAMILY_BITS[m.lastgroup]
+        if stop_at and mask.bit_count() >= stop_at:
+            break
+        m = search(prompt, m.start() + 1)
+    return mask
+
+
 def normalize_whitespace(s: str) -> str:
     """Normalize whitespace: strip and collapse multiple spaces into one."""
     return " ".join((s or "").split()).strip()
@@ -72,6 +130,8 @@ def fuzzy_match_keyword(word: str, keywords: list[str], threshold: float = 0.86)
     """Match a word to a list of keywords with fuzzy matching.
     
     Returns the original word if no match above threshold or word is too short.
+    Keywords whose cheap upper bounds (real_quick_ratio/quick_ratio) cannot reach
+    the threshold or beat the current best are skipped before the full ratio.
     """
     w = word.lower()
     if w in keywords or len(w) < 4:
@@ -80,7 +140,11 @@ def fuzzy_match_keyword(word: str, keywords: list[str], threshold: float = 0.86)
     best = None
     best_score = 0.0
     for k in keywords:
-        score = SequenceMatcher(None, w, k).ratio()
+        sm = SequenceMatcher(None, w, k)
+        floor = max(threshold, best_score)
+        if sm.real_quick_ratio() < floor or sm.quick_ratio() < floor:
+            continue
+        score = sm.ratio()
         if score > best_score:
             best_score = score
             best = k
@@ -88,7 +152,6 @@ def fuzzy_match_keyword(word: str, keywords: list[str], threshold: float = 0.86)
     return best if best and best_score >= threshold else word
 
 
-
 OPERATION_KEYWORDS = frozenset([
     "compress", "split", "extract", "keep", "merge", "combine", "join",
     "delete", "remove", "convert", "rotate", "reorder", "watermark",
@@ -104,3 +167,17 @@ UNIT_KEYWORDS = frozenset([
 ])
 
 ALL_NORMALIZE_KEYWORDS = list(OPERATION_KEYWORDS | CONNECTOR_KEYWORDS | UNIT_KEYWORDS)
+_NORMALIZE_KEYWORD_SET = frozenset(ALL_NORMALIZE_KEYWORDS)
+
+
+@lru_cache(maxsize=4096)
+def normalize_keyword(word: str) -> str:
+    """fuzzy_match_keyword against ALL_NORMALIZE_KEYWORDS, memoized per word.
+
+    Exact keywords and short words resolve through a set lookup; only the
+    remaining words pay for the fuzzy scan, once each.
+    """
+    w = word.lower()
+    if w in _NORMALIZE_KEYWORD_SET or len(w) < 4:
+        return w
+    return fuzzy_match_keyword(word, ALL_NORMALIZE_KEYWORDS)
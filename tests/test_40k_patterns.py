@@ -391,6 +391,94 @@ class TestIntegration:
             # Module not available in test environment
             pytest.skip("Clarification layer not available")
 
+    def test_clarification_heuristic_intents_validate(self):
+        """Test that heuristic intents (built without validation) are valid models"""
+        from app.clarification_layer import clarify_intent
+        from app.models import ParsedIntent
+
+        cases = [
+            ("compress", ["a.pdf"], ["compress"]),
+            ("compress to 2mb", ["a.pdf"], ["compress_to_target"]),
+            ("merge and compress", ["a.pdf", "b.pdf"], ["merge", "compress"]),
+            ("ocr and flatten", ["a.pdf"], ["ocr", "flatten_pdf"]),
+            ("enhance and ocr", ["a.pdf"], ["enhance_scan", "ocr"]),
+            ("rotate left", ["a.pdf"], ["rotate"]),
+            ("watermark DRAFT", ["a.pdf"], ["watermark"]),
+            ("extract text", ["a.pdf"], ["extract_text"]),
+            ("convert to word", ["a.pdf"], ["pdf_to_docx"]),
+            ("convert to pdf and compress", ["a.docx"], ["docx_to_pdf", "compress"]),
+            ("convert to pdf", ["a.jpg", "b.png"], ["images_to_pdf"]),
+            # Combo/workflow tables and branches that used to raise ValidationError
+            ("flatten", ["a.pdf"], ["flatten_pdf"]),
+            ("flatten it", ["a.pdf"], ["flatten_pdf"]),
+            ("clean and reverse pages", ["a.pdf"], ["remove_blank_pages", "reorder"]),
+            ("rotate and reverse", ["a.pdf"], ["rotate", "reorder"]),
+            ("clean and reorder pages to 2,1,3", ["a.pdf"], ["reorder", "remove_blank_pages"]),
+            ("merge and remove blank pages", ["a.pdf", "b.pdf"], ["merge", "remove_blank_pages"]),
+            ("email ready", ["a.pdf"], ["flatten_pdf", "compress"]),
+        ]
+        for prompt, files, expected_ops in cases:
+            result = clarify_intent(prompt, files)
+            assert result.intent is not None, prompt
+            intents = result.intent if isinstance(result.intent, list) else [result.intent]
+            assert [i.operation_type for i in intents] == expected_ops, prompt
+            for intent in intents:
+                ParsedIntent.model_validate(intent.model_dump())
+
+    def test_clarification_combo_reorder_keeps_page_order(self):
+        """Test that clean/rotate + reorder combos keep the reorder step"""
+        from app.clarification_layer import clarify_intent
+
+        cases = [
+            ("clean and reorder pages to 2,1,3", ["reorder", "remove_blank_pages"], [2, 1, 3]),
+            ("clean up and reorder 2,1,3", ["reorder", "remove_blank_pages"], [2, 1, 3]),
+            ("clean scan and reorder 2,1", ["reorder", "remove_blank_pages"], [2, 1]),
+            ("rotate 90 and reorder 2,1", ["rotate", "reorder"], [2, 1]),
+            ("clean and reverse pages", ["remove_blank_pages", "reorder"], "reverse"),
+            ("rotate and reverse", ["rotate", "reorder"], "reverse"),
+        ]
+        for prompt, expected_ops, expected_order in cases:
+            result = clarify_intent(prompt, ["a.pdf"])
+            assert [i.operation_type for i in result.intent] == expected_ops, prompt
+            reorder = next(i.reorder for i in result.intent if i.operation_type == "reorder")
+            assert reorder.new_order == expected_order, prompt
+
+        # Without a full order the combo asks instead of dropping the reorder step
+        for prompt in (
+            "clean and reorder",
+            "rotate and reorder",
+            "rotate 90 and swap pages 1 and 2",
+            "clean and swap pages 1 and 2",
+        ):
+            result = clarify_intent(prompt, ["a.pdf"])
+            assert result.intent is None, prompt
+            assert "page order" in result.clarification
+            assert len(result.options) == 2
+
+        # A third operation is left to the multi-step path, not answered with two steps
+        for prompt, extra_op in (
+            ("rotate 90, reorder 2,1 and add page numbers", "page_numbers"),
+            ("clean, reorder 2,1,3 and add watermark DRAFT", "watermark"),
+        ):
+            result = clarify_intent(prompt, ["a.pdf"])
+            if result.intent is not None:
+                intents = result.intent if isinstance(result.intent, list) else [result.intent]
+                assert extra_op in [i.operation_type for i in intents], prompt
+
+    def test_clarification_heuristic_presets_and_flatten(self):
+        """Test preset names and the flatten operation emitted by heuristics"""
+        from app.clarification_layer import clarify_intent
+
+        for prompt in ("flatten", "flatten it"):
+            result = clarify_intent(prompt, ["a.pdf"])
+            intents = result.intent if isinstance(result.intent, list) else [result.intent]
+            assert [i.operation_type for i in intents] == ["flatten_pdf"], prompt
+
+        for prompt in ("for email", "whatsapp size"):
+            result = clarify_intent(prompt, ["a.pdf"])
+            assert result.intent.operation_type == "compress", prompt
+            assert result.intent.compress.preset == "screen", prompt
+
 
 # ============================================
 # SPEC COMPLIANCE TESTS